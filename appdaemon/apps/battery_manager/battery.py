@@ -62,4 +62,8 @@ class Battery(ABC):
     @abstractmethod
     def is_available(self) -> bool:
         """Return True if battery is available for power control"""
+        pass
+    
+    def invalidate_cache(self):
+        """Drop state readings cached for the current update tick (no-op by default)"""
         pass
\ No newline at end of file
@@ -1,12 +1,47 @@
 """Battery Collection - Multi-battery coordination"""
-import time
-from typing import List, Dict
-from battery import Battery
+import math
+from typing import List, Dict, Tuple, NamedTuple
+from .battery import Battery
+
+
+class BatterySnapshot(NamedTuple):
+    """Readings of all available batteries taken in a single pass (one entry per battery)"""
+    batteries: Tuple[Battery, ...]
+    remaining_kwh: Tuple[float, ...]
+    capacity_kwh: Tuple[float, ...]
+    power_w: Tuple[float, ...]
+    
+    @property
+    def combined_remaining_kwh(self) -> float:
+        """Total remaining energy"""
+        return math.fsum(self.remaining_kwh)
+    
+    @property
+    def combined_capacity_kwh(self) -> float:
+        """Total capacity"""
+        return math.fsum(self.capacity_kwh)
+    
+    @property
+    def combined_power_w(self) -> float:
+        """Total current power"""
+        return math.fsum(self.power_w)
+    
+    @property
+    def combined_soc(self) -> float:
+        """Combined SoC: Total Remaining / Total Capacity * 100"""
+        total_capacity = self.combined_capacity_kwh
+        if total_capacity == 0:
+            return 0.0
+        return round((self.combined_remaining_kwh / total_capacity) * 100, 1)
 
 
 class BatteryCollection:
     """Manages multiple batteries as a unified system"""
     
+    # SoC limits for power distribution
+    MAX_CHARGE_SOC = 100.0    # Batteries at or above this SoC don't get charge power
+    MIN_DISCHARGE_SOC = 5.0   # Batteries at or below this SoC don't get discharge power
+    
     def __init__(self, batteries: List[Battery], app):
         self.batteries = {battery.name: battery for battery in batteries}
         self.app = app
@@ -15,10 +50,26 @@ class BatteryCollection:
         self._last_applied_power = {}  # battery_name -> last_applied_power_w
         self._power_tolerance = 5.0    # Skip if power change < 5W
         self._last_available_batteries = set()  # Track battery availability changes
+        # Available batteries are cached per update tick (see begin_tick)
+        self._tick = 0
+        self._available_cache = (None, -1)  # (available_batteries, tick)
+        # Proportional distribution weights, recomputed only when the eligible set changes
+        self._capacity_weights = {}  # battery_name -> share of eligible capacity
+        self._capacity_weights_key = None  # ((battery_name, capacity), ...) the weights belong to
+    
+    def begin_tick(self):
+        """Start a new update tick - invalidates cached per-tick battery data"""
+        self._tick += 1
+        for battery in self.batteries.values():
+            battery.invalidate_cache()
     
     def get_available_batteries(self) -> List[Battery]:
-        """Get list of available batteries"""
-        return [bat for bat in self.batteries.values() if bat.is_available()]
+        """Get list of available batteries (computed once per update tick)"""
+        available, tick = self._available_cache
+        if tick != self._tick:
+            available = [bat for bat in self.batteries.values() if bat.is_available()]
+            self._available_cache = (available, self._tick)
+        return available
     
     def _clear_power_cache(self):
         """Clear the power cache when battery configuration changes"""
@@ -27,31 +78,31 @@ class BatteryCollection:
             self._last_applied_power.clear()
     
     
+    def snapshot(self) -> BatterySnapshot:
+        """Read all available batteries once and return the values for combined metrics"""
+        available = self.get_available_batteries()
+        return BatterySnapshot(
+            batteries=tuple(available),
+            remaining_kwh=tuple(bat.get_remaining_kwh() for bat in available),
+            capacity_kwh=tuple(bat.get_total_capacity_kwh() for bat in available),
+            power_w=tuple(bat.get_current_power_w() for bat in available)
+        )
+    
     def get_combined_soc(self) -> float:
         """Calculate combined SoC: Total Remaining / Total Capacity * 100"""
-        available = self.get_available_batteries()
-        if not available:
-            return 0.0
-        
-        total_remaining = sum(bat.get_remaining_kwh() for bat in available)
-        total_capacity = sum(bat.get_total_capacity_kwh() for bat in available)
-        
-        if total_capacity == 0:
-            return 0.0
-        
-        return round((total_remaining / total_capacity) * 100, 1)
+        return self.snapshot().combined_soc
     
     def get_combined_remaining_kwh(self) -> float:
         """Get total remaining energy across all batteries"""
-        return sum(bat.get_remaining_kwh() for bat in self.get_available_batteries())
+        return self.snapshot().combined_remaining_kwh
     
     def get_combined_capacity_kwh(self) -> float:
         """Get total capacity across all batteries"""
-        return sum(bat.get_total_capacity_kwh() for bat in self.get_available_batteries())
+        return self.snapshot().combined_capacity_kwh
     
     def get_combined_current_power_w(self) -> float:
         """Get total current power across all batteries"""
-        return sum(bat.get_current_power_w() for bat in self.get_available_batteries())
+        return self.snapshot().combined_power_w
     
     def set_total_power_w(self, total_power_w: float) -> bool:
         """Set total power across all batteries with smart distribution"""
@@ -63,7 +114,7 @@ class BatteryCollection:
         # Clear cache if available batteries changed
         if current_available_names != self._last_available_batteries:
             self._clear_power_cache()
-            self._last_available_batteries = current_available_names.copy()
+            self._last_available_batteries = current_available_names
         
         if not available_batteries:
             self.app.log("No available batteries for power setting", level="WARNING")
@@ -74,105 +125,134 @@ class BatteryCollection:
         
         return success
     
+    def get_distribution_key(self, total_power_w: float) -> Tuple:
+        """Get a key identifying how a power request would be distributed
+        
+        The key contains the (name, capacity) pairs of the batteries eligible for
+        the request; if it and the request are unchanged, redistributing is a no-op.
+        """
+        battery_data = self._get_battery_data(self.get_available_batteries())
+        eligible_data, _ = self._get_eligible_batteries_for_power(battery_data, total_power_w)
+        return tuple((data[0].name, data[1]) for data in eligible_data)
+    
+    def _get_battery_data(self, batteries: List[Battery]) -> List[Tuple]:
+        """Snapshot battery values once: (battery, capacity, soc, max_charge, max_discharge)"""
+        return [(bat, bat.get_total_capacity_kwh(), bat.get_soc(),
+                 bat.get_max_charge_power_w(), bat.get_max_discharge_power_w())
+                for bat in batteries]
+    
     def _distribute_power_proportionally(self, total_power_w: float, batteries: List[Battery]) -> bool:
         """Distribute power proportionally based on battery capacity with SoC-aware charging"""
         if not batteries:
             return False
         
+        battery_data = self._get_battery_data(batteries)
+        
         # Filter batteries based on SoC and power direction
-        eligible_batteries = self._get_eligible_batteries_for_power(batteries, total_power_w)
+        eligible_data, eligible_names = self._get_eligible_batteries_for_power(battery_data, total_power_w)
         
-        if not eligible_batteries:
+        if not eligible_data:
             self.app.log(f"No eligible batteries for {total_power_w}W power request", level="WARNING")
             return False
         
-        # Calculate total capacity of eligible batteries only
-        total_eligible_capacity = sum(bat.get_total_capacity_kwh() for bat in eligible_batteries)
-        if total_eligible_capacity == 0:
+        # Capacity shares of eligible batteries only
+        capacity_weights = self._get_capacity_weights(eligible_data)
+        if not capacity_weights:
             return False
         
         success = True
         actual_total = 0
         
         # Log power redistribution if batteries were filtered out
-        if len(eligible_batteries) < len(batteries):
-            filtered_count = len(batteries) - len(eligible_batteries)
-            self.app.log(f"Redistributing {total_power_w}W among {len(eligible_batteries)} eligible batteries "
+        if len(eligible_data) < len(batteries):
+            filtered_count = len(batteries) - len(eligible_data)
+            self.app.log(f"Redistributing {total_power_w}W among {len(eligible_data)} eligible batteries "
                         f"({filtered_count} batteries filtered out due to SoC)", level="INFO")
         
-        for battery in eligible_batteries:
-            # Calculate proportional power based on eligible batteries only
-            capacity_ratio = battery.get_total_capacity_kwh() / total_eligible_capacity
-            battery_power_before_limits = total_power_w * capacity_ratio
-            
-            # Apply battery limits
-            battery_power_after_limits = self._apply_battery_limits(battery, battery_power_before_limits)
-            
-            battery_power = round(battery_power_after_limits)
-            
+        for battery, capacity, soc, max_charge, max_discharge in battery_data:
+            eligible = battery.name in eligible_names
+            if eligible:
+                # Calculate proportional power based on eligible batteries only
+                battery_power_before_limits = total_power_w * capacity_weights[battery.name]
+
+                # Apply battery limits
+                battery_power_after_limits = self._apply_battery_limits(battery_power_before_limits, max_charge, max_discharge)
+
+                battery_power = round(battery_power_after_limits)
+            else:
+                # Batteries excluded due to SoC are set to 0W (stop mode)
+                battery_power = 0
+
             # Check if power has changed significantly (with tolerance)
             last_applied_power = self._last_applied_power.get(battery.name)
-            
+
             if (last_applied_power is None or
                 abs(battery_power - last_applied_power) > self._power_tolerance):
-                
+
                 # Set battery power only if it changed significantly
                 if battery.set_power_w(battery_power):
                     # Update cache only on successful power application
                     self._last_applied_power[battery.name] = battery_power
                     actual_total += battery_power
-                    self.app.log(f"Applied {battery.name}: {battery_power}W", level="INFO")
+                    if eligible:
+                        self.app.log(f"Applied {battery.name}: {battery_power}W", level="INFO")
+                    else:
+                        self.app.log(f"Set {battery.name} to 0W (SoC: {soc:.1f}%)", level="INFO")
                 else:
                     success = False
                     self.app.log(f"Failed to set power for {battery.name}", level="ERROR")
             else:
                 # Power unchanged within tolerance, skip the call
                 actual_total += last_applied_power
-                self.app.log(f"Skipped {battery.name}: {battery_power}W (unchanged)", level="DEBUG")
-        
-        # Set filtered batteries to 0W (stop mode) if they were excluded
-        for battery in batteries:
-            if battery not in eligible_batteries:
-                # Set excluded batteries to 0W
-                if battery.set_power_w(0):
-                    self._last_applied_power[battery.name] = 0
-                    self.app.log(f"Set {battery.name} to 0W (SoC: {battery.get_soc():.1f}%)", level="INFO")
-        
+                self.app.log("Skipped %s: %sW (unchanged)", battery.name, battery_power, level="DEBUG")
+
         return success
     
-    def _get_eligible_batteries_for_power(self, batteries: List[Battery], total_power_w: float) -> List[Battery]:
-        """Filter batteries based on SoC and power direction"""
-        eligible = []
-        
-        for battery in batteries:
-            soc = battery.get_soc()
-            
-            if total_power_w > 0:  # Charging request
-                # Skip batteries at 100% SoC for charging
-                if soc >= 100.0:
-                    self.app.log(f"Skipping {battery.name} for charging (SoC: {soc:.1f}%)", level="DEBUG")
-                    continue
-                else:
-                    eligible.append(battery)
-            elif total_power_w < 0:  # Discharging request
-                # Skip batteries at very low SoC for discharging (e.g., below 5%)
-                if soc <= 5.0:
-                    self.app.log(f"Skipping {battery.name} for discharging (SoC: {soc:.1f}%)", level="DEBUG")
-                    continue
-                else:
-                    eligible.append(battery)
-            else:  # Zero power request
-                # All batteries are eligible for stop command
-                eligible.append(battery)
+    def _get_capacity_weights(self, eligible_data: List[Tuple]) -> Dict[str, float]:
+        """Get each eligible battery's share of the total eligible capacity
+        
+        Weights are cached and only recomputed when the eligible batteries or
+        their capacities change. Returns an empty dict if total capacity is 0.
+        """
+        key = tuple((data[0].name, data[1]) for data in eligible_data)
+        if key != self._capacity_weights_key:
+            total_capacity = sum(capacity for _, capacity in key)
+            if total_capacity == 0:
+                self._capacity_weights = {}
+            else:
+                self._capacity_weights = {name: capacity / total_capacity for name, capacity in key}
+            self._capacity_weights_key = key
+        return self._capacity_weights
+    
+    def _get_eligible_batteries_for_power(self, battery_data: List[Tuple], total_power_w: float) -> Tuple[List[Tuple], set]:
+        """Filter battery snapshot tuples based on SoC and power direction
+        
+        Returns:
+            Tuple of (eligible snapshot tuples, set of eligible battery names)
+        """
+        if total_power_w > 0:  # Charging request - skip full batteries
+            direction = "charging"
+            eligible = [data for data in battery_data if data[2] < self.MAX_CHARGE_SOC]
+        elif total_power_w < 0:  # Discharging request - skip batteries at very low SoC
+            direction = "discharging"
+            eligible = [data for data in battery_data if data[2] > self.MIN_DISCHARGE_SOC]
+        else:  # Zero power request - all batteries are eligible for stop command
+            return list(battery_data), {data[0].name for data in battery_data}
+        
+        eligible_names = {data[0].name for data in eligible}
+        if len(eligible) < len(battery_data):
+            for battery, capacity, soc, max_charge, max_discharge in battery_data:
+                if battery.name not in eligible_names:
+                    self.app.log("Skipping %s for %s (SoC: %.1f%%)", battery.name, direction, soc, level="DEBUG")
         
-        return eligible
+        return eligible, eligible_names
     
-    def _apply_battery_limits(self, battery: Battery, requested_power: float) -> float:
+    def _apply_battery_limits(self, requested_power: float, max_charge_w: float, max_discharge_w: float) -> float:
         """Apply battery power limits"""
         if requested_power > 0:  # Charge (positive power)
-            limited_power = min(requested_power, battery.get_max_charge_power_w())
+            limited_power = min(requested_power, max_charge_w)
         else:  # Discharge (negative power)
-            limited_power = max(requested_power, -battery.get_max_discharge_power_w())
+            limited_power = max(requested_power, -max_discharge_w)
         
         
         return limited_power
@@ -181,8 +261,9 @@ class BatteryCollection:
         """Stop all batteries"""
         self._target_power = 0
         
-        # Clear cache when stopping all batteries
+        # Clear cache when stopping all batteries and read fresh battery states
         self._clear_power_cache()
+        self.begin_tick()
         
         for battery in self.batteries.values():
             if battery.is_available():
@@ -1,7 +1,6 @@
 """Battery Collection - Multi-battery coordination"""
-import time
 from typing import List, Dict
-from battery import Battery
+from .battery import Battery
 
 
 class BatteryCollection:
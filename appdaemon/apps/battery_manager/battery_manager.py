@@ -1,29 +1,62 @@
 """Battery Manager - Main orchestrator for battery management system"""
 import appdaemon.plugins.hass.hassapi as hass
-import sys
-import os
-import time
 from typing import Dict, List
 
-# Add the battery_manager directory to the Python path
-sys.path.insert(0, os.path.dirname(__file__))
+from .battery_collection import BatteryCollection
+from .marstek_battery import MarstekBattery
 
-# Force reload of modules to ensure latest changes are loaded
-import importlib
-try:
-    import marstek_battery
-    importlib.reload(marstek_battery)
-    from marstek_battery import MarstekBattery
-except Exception as e:
-    # Fallback to normal import if reload fails
-    from marstek_battery import MarstekBattery
+# Static status sensor attributes - shared between updates, never mutate
+_COMBINED_SOC_ATTRIBUTES = {
+    "unit_of_measurement": "%",
+    "device_class": "battery",
+    "state_class": "measurement",
+    "friendly_name": "Combined Battery SoC",
+    "icon": "mdi:battery"
+}
 
-from battery_collection import BatteryCollection
+_COMBINED_POWER_ATTRIBUTES = {
+    "unit_of_measurement": "W",
+    "device_class": "power",
+    "state_class": "measurement",
+    "friendly_name": "Combined Battery Power",
+    "icon": "mdi:flash"
+}
+
+_COMBINED_CAPACITY_ATTRIBUTES = {
+    "unit_of_measurement": "kWh",
+    "device_class": "energy_storage",
+    "state_class": "measurement",
+    "friendly_name": "Combined Battery Capacity",
+    "icon": "mdi:battery-charging-100"
+}
+
+_COMBINED_REMAINING_ATTRIBUTES = {
+    "unit_of_measurement": "kWh",
+    "device_class": "energy_storage",
+    "state_class": "measurement",
+    "friendly_name": "Combined Battery Remaining",
+    "icon": "mdi:battery-arrow-down"
+}
+
+_STATUS_ATTRIBUTES = {
+    "friendly_name": "Battery Manager Status",
+    "icon": "mdi:cog"
+}
+
+_ACTUAL_POWER_ATTRIBUTES = {
+    "unit_of_measurement": "W",
+    "device_class": "power",
+    "friendly_name": "Battery Manager Actual Power",
+    "icon": "mdi:flash-outline"
+}
 
 
 class BatteryManager(hass.Hass):
     """Main battery management orchestrator - SOLID principle: only manages batteries"""
     
+    # Re-publish all status sensors periodically even if unchanged (e.g. after an HA restart)
+    SENSOR_REFRESH_UPDATES = 30
+    
     def initialize(self):
         """Initialize the Battery Manager"""
         try:
@@ -34,12 +67,25 @@ class BatteryManager(hass.Hass):
             self.log("Loading configuration...")
             self.update_interval = self.args.get('update_interval', 2)
             
+            # Last published status sensor values: entity_id -> (state, attributes)
+            self._last_sensor_state = {}
+            
+            # (target_power, distribution key) of the last successful periodic redistribution
+            self._last_distribution = None
+            
             # Initialize batteries from configuration
             self.log("Initializing batteries...")
             self.batteries = self._initialize_batteries()
             self.log("Creating battery collection...")
             self.battery_collection = BatteryCollection(list(self.batteries.values()), self)
             
+            # Individual battery status sensors: name -> (entity_id, static attributes)
+            self._battery_status_sensors = {
+                name: (f"sensor.battery_{name.lower()}_status",
+                       {"friendly_name": f"Battery {name} Status", "icon": "mdi:battery-outline"})
+                for name in self.batteries
+            }
+            
             # Create and set up Home Assistant entities
             self.log("Creating control entities...")
             self._create_control_entities()
@@ -118,78 +164,71 @@ class BatteryManager(hass.Hass):
     
     def _create_status_sensors(self):
         """Create Home Assistant status sensors"""
+        # Read all batteries once for the combined sensors
+        snapshot = self.battery_collection.snapshot()
+        
         # Combined battery sensors
-        self.set_state("sensor.combined_battery_soc",
-                      state=self.battery_collection.get_combined_soc(),
-                      attributes={
-                          "unit_of_measurement": "%",
-                          "device_class": "battery",
-                          "state_class": "measurement",
-                          "friendly_name": "Combined Battery SoC",
-                          "icon": "mdi:battery"
-                      })
+        self._maybe_set_state("sensor.combined_battery_soc",
+                             state=snapshot.combined_soc,
+                             attributes=_COMBINED_SOC_ATTRIBUTES)
         
-        self.set_state("sensor.combined_battery_power",
-                      state=self.battery_collection.get_combined_current_power_w(),
-                      attributes={
-                          "unit_of_measurement": "W",
-                          "device_class": "power",
-                          "state_class": "measurement",
-                          "friendly_name": "Combined Battery Power",
-                          "icon": "mdi:flash"
-                      })
+        self._maybe_set_state("sensor.combined_battery_power",
+                             state=snapshot.combined_power_w,
+                             attributes=_COMBINED_POWER_ATTRIBUTES,
+                             tolerance=1.0)
         
-        self.set_state("sensor.combined_battery_capacity",
-                      state=self.battery_collection.get_combined_capacity_kwh(),
-                      attributes={
-                          "unit_of_measurement": "kWh",
-                          "device_class": "energy_storage",
-                          "state_class": "measurement",
-                          "friendly_name": "Combined Battery Capacity",
-                          "icon": "mdi:battery-charging-100"
-                      })
+        self._maybe_set_state("sensor.combined_battery_capacity",
+                             state=snapshot.combined_capacity_kwh,
+                             attributes=_COMBINED_CAPACITY_ATTRIBUTES,
+                             tolerance=0.01)
         
-        self.set_state("sensor.combined_battery_remaining",
-                      state=self.battery_collection.get_combined_remaining_kwh(),
-                      attributes={
-                          "unit_of_measurement": "kWh",
-                          "device_class": "energy_storage",
-                          "state_class": "measurement",
-                          "friendly_name": "Combined Battery Remaining",
-                          "icon": "mdi:battery-arrow-down"
-                      })
+        self._maybe_set_state("sensor.combined_battery_remaining",
+                             state=snapshot.combined_remaining_kwh,
+                             attributes=_COMBINED_REMAINING_ATTRIBUTES,
+                             tolerance=0.01)
         
         # System status sensors
-        self.set_state("sensor.battery_manager_status",
-                      state=self._get_system_status(),
-                      attributes={
-                          "friendly_name": "Battery Manager Status",
-                          "icon": "mdi:cog"
-                      })
+        self._maybe_set_state("sensor.battery_manager_status",
+                             state=self._get_system_status(),
+                             attributes=_STATUS_ATTRIBUTES)
         
         # Invert the actual power to match our convention (positive=charge, negative=discharge)
-        actual_power = -self.battery_collection.get_combined_current_power_w()
-        self.set_state("sensor.battery_manager_actual_power",
-                      state=actual_power,
-                      attributes={
-                          "unit_of_measurement": "W",
-                          "device_class": "power",
-                          "friendly_name": "Battery Manager Actual Power",
-                          "icon": "mdi:flash-outline"
-                      })
+        actual_power = -snapshot.combined_power_w
+        self._maybe_set_state("sensor.battery_manager_actual_power",
+                             state=actual_power,
+                             attributes=_ACTUAL_POWER_ATTRIBUTES,
+                             tolerance=1.0)
         
-        # Individual battery status sensors
+        # Individual battery status sensors (static attributes built once in initialize)
         for name, battery in self.batteries.items():
-            entity_id = f"sensor.battery_{name.lower()}_status"
-            self.set_state(entity_id,
-                          state=battery.get_state().value,
-                          attributes={
-                              "friendly_name": f"Battery {name} Status",
-                              "soc": battery.get_soc(),
-                              "power_w": battery.get_current_power_w(),
-                              "available": battery.is_available(),
-                              "icon": "mdi:battery-outline"
-                          })
+            entity_id, static_attributes = self._battery_status_sensors[name]
+            self._maybe_set_state(entity_id,
+                                 state=battery.get_state().value,
+                                 attributes={
+                                     **static_attributes,
+                                     "soc": battery.get_soc(),
+                                     "power_w": battery.get_current_power_w(),
+                                     "available": battery.is_available()
+                                 })
+    
+    def _maybe_set_state(self, entity_id: str, state, attributes: dict, tolerance: float = 0):
+        """Publish a sensor state only if it changed since the last publish
+        
+        Numeric states within the tolerance count as unchanged. All sensors are
+        re-published every SENSOR_REFRESH_UPDATES periodic updates regardless.
+        """
+        last = self._last_sensor_state.get(entity_id)
+        if last is not None:
+            last_state, last_attributes = last
+            if isinstance(state, (int, float)) and isinstance(last_state, (int, float)):
+                unchanged = abs(state - last_state) <= tolerance
+            else:
+                unchanged = state == last_state
+            if unchanged and attributes == last_attributes:
+                return
+        
+        self.set_state(entity_id, state=state, attributes=attributes)
+        self._last_sensor_state[entity_id] = (state, attributes)
     
     def _setup_entity_listeners(self):
         """Set up listeners for control entities"""
@@ -211,6 +250,7 @@ class BatteryManager(hass.Hass):
     
     def _on_target_power_change(self, entity, attribute, old, new, kwargs):
         """Handle target power changes from HA number entity"""
+        self.battery_collection.begin_tick()
         try:
             target_power = float(new)
             success = self._apply_target_power(target_power)
@@ -220,6 +260,11 @@ class BatteryManager(hass.Hass):
     
     def _on_enabled_change(self, entity, attribute, old, new, kwargs):
         """Handle enable/disable from HA boolean entity"""
+        if old == new:
+            # Attribute-only or repeated update - nothing to reset
+            return
+        
+        self.battery_collection.begin_tick()
         if new == "off":
             self._reset_to_safe_state()
             self.log("Battery Manager disabled - reset to safe state")
@@ -229,15 +274,20 @@ class BatteryManager(hass.Hass):
     
     def _periodic_update(self, kwargs):
         """Periodic update of sensors and system health"""
+        self.battery_collection.begin_tick()
         try:
             # Update all status sensors
             self._create_status_sensors()
             
-            # Redistribute power every update (handles newly available batteries)
+            # Redistribute power when the target or the eligible batteries changed
+            # (handles newly available batteries)
             target_power_state = self.get_state("input_number.battery_manager_target_power")
             if target_power_state is not None:
                 target_power = float(target_power_state)
-                self._apply_target_power(target_power)
+                distribution = (target_power, self.battery_collection.get_distribution_key(target_power))
+                if distribution != self._last_distribution:
+                    if self._apply_target_power(target_power):
+                        self._last_distribution = distribution
             
             # Log system status periodically
             if hasattr(self, '_update_counter'):
@@ -245,6 +295,10 @@ class BatteryManager(hass.Hass):
             else:
                 self._update_counter = 1
             
+            # Force a full sensor re-publish on the next update
+            if self._update_counter % self.SENSOR_REFRESH_UPDATES == 0:
+                self._last_sensor_state.clear()
+            
             # Log every update (every 2 seconds)
             self._log_system_status()
         
@@ -271,10 +325,11 @@ class BatteryManager(hass.Hass):
     
     def _log_system_status(self):
         """Log current system status"""
-        soc = self.battery_collection.get_combined_soc()
-        power = self.battery_collection.get_combined_current_power_w()
+        snapshot = self.battery_collection.snapshot()
+        soc = snapshot.combined_soc
+        power = snapshot.combined_power_w
         target = self.battery_collection._target_power
-        available_count = len(self.battery_collection.get_available_batteries())
+        available_count = len(snapshot.batteries)
         total_count = len(self.batteries)
         
         self.log(f"System Status - SoC: {soc:.1f}%, Power: {power:.0f}W "
@@ -294,6 +349,7 @@ class BatteryManager(hass.Hass):
             
             # Reset internal target power
             self.battery_collection._target_power = 0
+            self._last_distribution = None
             
             self.log("System reset to safe state - target power: 0W, all batteries stopped")
             
@@ -1,20 +1,47 @@
 """Marstek Battery Implementation"""
-from battery import Battery, BatteryState
-import time
+from .battery import Battery, BatteryState
+
+# Marstek inverter state -> BatteryState (unknown states mean the battery is offline)
+_INVERTER_STATE_MAP = {
+    'Sleep': BatteryState.AVAILABLE,
+    'Standby': BatteryState.AVAILABLE,
+    'Charge': BatteryState.CHARGING,
+    'Discharge': BatteryState.DISCHARGING,
+    'Fault': BatteryState.FAULT,
+    'Idle': BatteryState.AVAILABLE,
+    'AC bypass': BatteryState.AVAILABLE
+}
+
+# States in which the battery can't be controlled
+_UNAVAILABLE_STATES = frozenset((BatteryState.FAULT, BatteryState.OFFLINE))
+
+# rs485 control mode value required for power control
+_CONTROL_MODE_ENABLED = 'enable'
 
 
 class MarstekBattery(Battery):
     """Implementation for Marstek battery systems (like Akku1)"""
     
+    # Power limits of the Marstek inverter
+    MAX_CHARGE_POWER_W = 2500.0
+    MAX_DISCHARGE_POWER_W = 2500.0
+    
     def __init__(self, name: str, app, device_prefix: str):
         super().__init__(name, app)
         self.device_prefix = device_prefix
         self._entity_ids = self._build_entity_ids()
+        self._actions = self._build_actions()
         
         # Cache last set values to avoid redundant service calls
         self._cached_force_mode = None
         self._cached_charge_power = None
         self._cached_discharge_power = None
+        
+        # HA states read during the current update tick: entity key -> state
+        self._state_cache = {}
+        
+        # Static battery properties - avoid HA state lookups on every update cycle
+        self._cached_total_capacity_kwh = None
     
     def _build_entity_ids(self) -> dict:
         """Build entity ID mapping for this battery"""
@@ -32,79 +59,105 @@ class MarstekBattery(Battery):
             'max_discharge': f'number.{self.device_prefix}_max_discharge_power'
         }
     
+    def _build_actions(self) -> dict:
+        """Build control action mapping: action -> (entity_id, cached_attr, service_domain, service_name, data_key)"""
+        return {
+            'force_mode': (self._entity_ids['force_mode'], '_cached_force_mode', 'select', 'select_option', 'option'),
+            'charge_power': (self._entity_ids['charge_power'], '_cached_charge_power', 'number', 'set_value', 'value'),
+            'discharge_power': (self._entity_ids['discharge_power'], '_cached_discharge_power', 'number', 'set_value', 'value')
+        }
+    
+    def _get(self, key: str):
+        """Get an entity state, read from HA at most once per update tick"""
+        if key not in self._state_cache:
+            self._state_cache[key] = self.app.get_state(self._entity_ids[key])
+        return self._state_cache[key]
+    
+    def invalidate_cache(self):
+        """Drop state readings cached for the current update tick"""
+        self._state_cache.clear()
+    
     def get_soc(self) -> float:
         """Get State of Charge percentage"""
-        return float(self.app.get_state(self._entity_ids['soc']) or 0)
+        return float(self._get('soc') or 0)
     
     def get_remaining_kwh(self) -> float:
         """Get remaining energy in kWh"""
-        return float(self.app.get_state(self._entity_ids['remaining_kwh']) or 0)
+        return float(self._get('remaining_kwh') or 0)
     
     def get_total_capacity_kwh(self) -> float:
-        """Get total battery capacity in kWh"""
-        return float(self.app.get_state(self._entity_ids['total_kwh']) or 0)
+        """Get total battery capacity in kWh (cached after the first valid reading)"""
+        if self._cached_total_capacity_kwh is None:
+            capacity = float(self._get('total_kwh') or 0)
+            if capacity <= 0:
+                # Sensor not ready yet - don't cache, retry on next call
+                return 0.0
+            self._cached_total_capacity_kwh = capacity
+        return self._cached_total_capacity_kwh
     
     def get_current_power_w(self) -> float:
         """Get current AC power (positive=charge, negative=discharge)"""
-        return float(self.app.get_state(self._entity_ids['ac_power']) or 0)
+        return float(self._get('ac_power') or 0)
     
     def get_state(self) -> BatteryState:
         """Get current battery operational state"""
-        inverter_state = self.app.get_state(self._entity_ids['inverter_state'])
-        
-        state_mapping = {
-            'Sleep': BatteryState.AVAILABLE,
-            'Standby': BatteryState.AVAILABLE,
-            'Charge': BatteryState.CHARGING,
-            'Discharge': BatteryState.DISCHARGING,
-            'Fault': BatteryState.FAULT,
-            'Idle': BatteryState.AVAILABLE,
-            'AC bypass': BatteryState.AVAILABLE
-        }
-        
-        return state_mapping.get(inverter_state, BatteryState.OFFLINE)
+        inverter_state = self._get('inverter_state')
+        return _INVERTER_STATE_MAP.get(inverter_state, BatteryState.OFFLINE)
     
     def is_available(self) -> bool:
         """Check if battery is available for power control"""
-        state = self.get_state()
-        control_mode_value = self.app.get_state(self._entity_ids['control_mode'])
-        control_enabled = control_mode_value == 'enable'
-        
-        return (state != BatteryState.FAULT and
-                state != BatteryState.OFFLINE and
-                control_enabled)
+        if self._get('control_mode') != _CONTROL_MODE_ENABLED:
+            return False
+        return self.get_state() not in _UNAVAILABLE_STATES
     
     def set_power_w(self, power_w: float) -> bool:
         """Set battery power (positive=charge, negative=discharge)"""
+        # Steady state: the battery already runs at this setpoint, skip the HA reads
+        if self._is_setpoint_unchanged(power_w):
+            self.app.log("%s already at %.0fW, skipping", self.name, power_w, level="DEBUG")
+            return True
+        
         if not self.is_available():
-            self.app.log(f"Battery {self.name} not available for power control", level="WARNING")
+            self.app.log("Battery %s not available for power control", self.name, level="WARNING")
             return False
         
         try:
             if abs(power_w) < 10:  # Stop battery (power close to 0)
-                self.app.log(f"Setting {self.name} to STOP mode (power: {power_w:.0f}W)", level="INFO")
+                self.app.log("Setting %s to STOP mode (power: %.0fW)", self.name, power_w, level="INFO")
                 self._stop_battery()
             elif power_w > 0:  # Charge (positive power)
-                self.app.log(f"Setting {self.name} to CHARGE mode at {power_w:.0f}W", level="INFO")
+                self.app.log("Setting %s to CHARGE mode at %.0fW", self.name, power_w, level="INFO")
                 self._set_charge_power(power_w)
             else:  # Discharge (negative power)
                 discharge_power = abs(power_w)
-                self.app.log(f"Setting {self.name} to DISCHARGE mode at {discharge_power:.0f}W", level="INFO")
+                self.app.log("Setting %s to DISCHARGE mode at %.0fW", self.name, discharge_power, level="INFO")
                 self._set_discharge_power(discharge_power)
             
             return True
             
         except Exception as e:
-            self.app.log(f"Error setting power for {self.name}: {e}", level="ERROR")
+            self.app.log("Error setting power for %s: %s", self.name, e, level="ERROR")
             return False
     
+    def _is_setpoint_unchanged(self, power_w: float) -> bool:
+        """Check if the cached force mode and power already match a power request"""
+        if abs(power_w) < 10:
+            return self._cached_force_mode == 'stop'
+        if power_w > 0:
+            mode, cached_power, max_power = 'charge', self._cached_charge_power, self.MAX_CHARGE_POWER_W
+        else:
+            mode, cached_power, max_power = 'discharge', self._cached_discharge_power, self.MAX_DISCHARGE_POWER_W
+        if self._cached_force_mode != mode or cached_power is None:
+            return False
+        return abs(round(min(abs(power_w), max_power)) - cached_power) <= 0.5
+    
     def get_max_charge_power_w(self) -> float:
         """Get maximum charge power"""
-        return float(2500)
+        return self.MAX_CHARGE_POWER_W
     
     def get_max_discharge_power_w(self) -> float:
         """Get maximum discharge power"""
-        return float(2500)
+        return self.MAX_DISCHARGE_POWER_W
     
     
     def _set_entity_if_changed(self, entity_id: str, new_value, cached_attr: str, service_domain: str, service_name: str, **service_data):
@@ -118,7 +171,7 @@ class MarstekBattery(Battery):
             changed = new_value != current_cached
             
         if changed or current_cached is None:
-            self.app.log(f"Setting {entity_id} from {current_cached} to {new_value}", level="INFO")
+            self.app.log("Setting %s from %s to %s", entity_id, current_cached, new_value, level="INFO")
             try:
                 self.app.call_service(f'{service_domain}/{service_name}',
                                     entity_id=entity_id,
@@ -126,71 +179,34 @@ class MarstekBattery(Battery):
                 setattr(self, cached_attr, new_value)
                 return True
             except Exception as e:
-                self.app.log(f"Error setting {entity_id}: {e}", level="ERROR")
+                self.app.log("Error setting %s: %s", entity_id, e, level="ERROR")
                 return False
         else:
-            self.app.log(f"{entity_id} already {current_cached}, skipping", level="DEBUG")
+            self.app.log("%s already %s, skipping", entity_id, current_cached, level="DEBUG")
             return True
     
+    def _apply_action(self, action: str, value):
+        """Write a value to the entity of a control action if it changed"""
+        entity_id, cached_attr, service_domain, service_name, data_key = self._actions[action]
+        self._set_entity_if_changed(entity_id, value, cached_attr, service_domain, service_name,
+                                    **{data_key: value})
+    
     def _stop_battery(self):
         """Stop battery charging/discharging"""
-        self._set_entity_if_changed(
-            entity_id=self._entity_ids['force_mode'],
-            new_value='stop',
-            cached_attr='_cached_force_mode',
-            service_domain='select',
-            service_name='select_option',
-            option='stop'
-        )
+        self._apply_action('force_mode', 'stop')
     
     def _set_discharge_power(self, power_w: float):
         """Set battery to discharge at specified power"""
-        max_power = self.get_max_discharge_power_w()
-        limited_power = min(power_w, max_power)
-        rounded_power = round(limited_power)
-        
-        # Set discharge power if changed
-        self._set_entity_if_changed(
-            entity_id=self._entity_ids['discharge_power'],
-            new_value=rounded_power,
-            cached_attr='_cached_discharge_power',
-            service_domain='number',
-            service_name='set_value',
-            value=rounded_power
-        )
+        rounded_power = round(min(power_w, self.MAX_DISCHARGE_POWER_W))
         
-        # Set force mode to discharge if changed
-        self._set_entity_if_changed(
-            entity_id=self._entity_ids['force_mode'],
-            new_value='discharge',
-            cached_attr='_cached_force_mode',
-            service_domain='select',
-            service_name='select_option',
-            option='discharge'
-        )
+        # Set discharge power, then force mode to discharge (each only if changed)
+        self._apply_action('discharge_power', rounded_power)
+        self._apply_action('force_mode', 'discharge')
     
     def _set_charge_power(self, power_w: float):
         """Set battery to charge at specified power"""
-        max_power = self.get_max_charge_power_w()
-        limited_power = min(power_w, max_power)
-        rounded_power = round(limited_power)
-        
-        # Set charge power if changed
-        self._set_entity_if_changed(
-            entity_id=self._entity_ids['charge_power'],
-            new_value=rounded_power,
-            cached_attr='_cached_charge_power',
-            service_domain='number',
-            service_name='set_value',
-            value=rounded_power
-        )
+        rounded_power = round(min(power_w, self.MAX_CHARGE_POWER_W))
         
-        # Set force mode to charge if changed
-        self._set_entity_if_changed(
-            entity_id=self._entity_ids['force_mode'],
-            new_value='charge',
-            cached_attr='_cached_force_mode',
-            service_domain='select',
-            service_name='select_option',
-            option='charge'
-        )
\ No newline at end of file
+        # Set charge power, then force mode to charge (each only if changed)
+        self._apply_action('charge_power', rounded_power)
+        self._apply_action('force_mode', 'charge')
@@ -5,17 +5,125 @@ Specialized integration test utilities for the Battery Manager application.
 Provides battery manager specific test data, scenarios, and assertions.
 """
 
-import sys
-import os
+import copy
+import re
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
-# Add the apps directory to Python path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
 from ...tests.integration_test_base import IntegrationTestBase
 
 
+# Default battery manager configuration, shared by all helpers that only read it
+_DEFAULT_CONFIG = {
+    'update_interval': 2,
+    'batteries': [
+        {
+            'name': 'Battery1',
+            'type': 'marstek',
+            'device_prefix': 'battery1'
+        },
+        {
+            'name': 'Battery2', 
+            'type': 'marstek',
+            'device_prefix': 'battery2'
+        },
+        {
+            'name': 'Battery3',
+            'type': 'marstek', 
+            'device_prefix': 'battery3'
+        }
+    ]
+}
+
+# Device prefixes and status sensors of the configured batteries
+_BATTERY_PREFIXES = tuple(battery['device_prefix'] for battery in _DEFAULT_CONFIG['batteries'])
+_BATTERY_STATUS_SENSORS = tuple(f"sensor.battery_{battery['name'].lower()}_status"
+                                for battery in _DEFAULT_CONFIG['batteries'])
+
+# Battery capacities used by setup_realistic_battery_states: device_prefix -> kWh
+_BATTERY_CAPACITY_KWH = {'battery1': 5.0, 'battery2': 10.0, 'battery3': 5.0}
+
+# Control entity states every test starts from (target 0W, manager enabled)
+_CONTROL_STATES = {
+    'input_number.battery_manager_target_power': {"state": "0"},
+    'input_boolean.battery_manager_enabled': {"state": "on"}
+}
+
+# Battery entity names, formatted with the device prefix
+_SENSOR_NAME_TEMPLATES = {
+    'soc': 'sensor.{prefix}_battery_state_of_charge',
+    'remaining': 'sensor.{prefix}_battery_remaining_capacity',
+    'total': 'sensor.{prefix}_battery_total_energy',
+    'power': 'sensor.{prefix}_ac_power',
+    'state': 'sensor.{prefix}_inverter_state',
+    'control': 'select.{prefix}_rs485_control_mode',
+    'max_charge': 'number.{prefix}_max_charge_power',
+    'max_discharge': 'number.{prefix}_max_discharge_power',
+    'force_charge': 'number.{prefix}_forcible_charge_power',
+    'force_discharge': 'number.{prefix}_forcible_discharge_power',
+    'force_mode': 'select.{prefix}_forcible_chargedischarge'
+}
+
+# Battery device prefix in an entity ID, e.g. "battery2" in "number.battery2_forcible_charge_power"
+_BATTERY_PREFIX_RE = re.compile(r'(battery\d+)')
+
+# Formatted sensor names per device prefix, filled by _get_sensor_names
+_SENSOR_NAMES_BY_PREFIX: Dict[str, Dict[str, str]] = {}
+
+
+def _get_sensor_names(battery_prefix: str) -> Dict[str, str]:
+    """Get sensor names for a battery prefix (built once per prefix, don't modify)"""
+    sensor_names = _SENSOR_NAMES_BY_PREFIX.get(battery_prefix)
+    if sensor_names is None:
+        sensor_names = {key: template.format(prefix=battery_prefix)
+                        for key, template in _SENSOR_NAME_TEMPLATES.items()}
+        _SENSOR_NAMES_BY_PREFIX[battery_prefix] = sensor_names
+    return sensor_names
+
+
+def _copy_states(states: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Copy a states template so the mock can't modify the shared state dicts"""
+    return {entity_id: dict(state) for entity_id, state in states.items()}
+
+
+def _battery_state(battery_prefix: str, soc: float, remaining_kwh: float, total_kwh: float,
+                   max_charge_w: float, max_discharge_w: float, inverter_state: str = "Sleep") -> Dict[str, Dict[str, str]]:
+    """Build the initial states of one available, idle battery keyed by its sensor names"""
+    sensors = _get_sensor_names(battery_prefix)
+    return {
+        sensors['soc']: {"state": str(soc)},
+        sensors['remaining']: {"state": str(remaining_kwh)},
+        sensors['total']: {"state": str(total_kwh)},
+        sensors['power']: {"state": "0"},
+        sensors['state']: {"state": inverter_state},
+        sensors['control']: {"state": "enable"},
+        sensors['max_charge']: {"state": str(max_charge_w)},
+        sensors['max_discharge']: {"state": str(max_discharge_w)}
+    }
+
+
+def _build_realistic_states() -> Dict[str, Dict[str, Any]]:
+    """Build realistic initial states for all configured batteries"""
+    return {
+        # Battery 1 - 75% SoC, 5kWh capacity, available
+        **_battery_state('battery1', 75.0, 3.75, 5.0, 2500, 2500, "Sleep"),
+        # Battery 2 - 60% SoC, 10kWh capacity, available
+        **_battery_state('battery2', 60.0, 6.0, 10.0, 5000, 5000, "Standby"),
+        # Battery 3 - 85% SoC, 5kWh capacity, available
+        **_battery_state('battery3', 85.0, 4.25, 5.0, 2500, 2500, "Idle"),
+        # Control entities
+        **_CONTROL_STATES
+    }
+
+
+# Realistic initial states, built once at import (see setup_realistic_battery_states)
+_REALISTIC_STATES = _build_realistic_states()
+
+# Sensor names of all configured batteries are formatted up front
+for _prefix in _BATTERY_PREFIXES:
+    _get_sensor_names(_prefix)
+
+
 class BatteryManagerIntegrationTest(IntegrationTestBase):
     """
     Specialized integration test base for Battery Manager
@@ -24,94 +132,23 @@ class BatteryManagerIntegrationTest(IntegrationTestBase):
     """
     
     def get_default_config(self) -> Dict[str, Any]:
-        """Get default configuration for battery manager tests"""
-        return {
-            'update_interval': 2,
-            'batteries': [
-                {
-                    'name': 'Battery1',
-                    'type': 'marstek',
-                    'device_prefix': 'battery1'
-                },
-                {
-                    'name': 'Battery2', 
-                    'type': 'marstek',
-                    'device_prefix': 'battery2'
-                },
-                {
-                    'name': 'Battery3',
-                    'type': 'marstek', 
-                    'device_prefix': 'battery3'
-                }
-            ]
-        }
+        """Get default configuration for battery manager tests (a fresh copy the app may modify)"""
+        return copy.deepcopy(_DEFAULT_CONFIG)
     
-    def get_battery_sensor_names(self, battery_prefix: str) -> Dict[str, str]:
-        """Get sensor names for a specific battery"""
-        return {
-            'soc': f'sensor.{battery_prefix}_battery_state_of_charge',
-            'remaining': f'sensor.{battery_prefix}_battery_remaining_capacity',
-            'total': f'sensor.{battery_prefix}_battery_total_energy',
-            'power': f'sensor.{battery_prefix}_ac_power',
-            'state': f'sensor.{battery_prefix}_inverter_state',
-            'control': f'select.{battery_prefix}_rs485_control_mode',
-            'max_charge': f'number.{battery_prefix}_max_charge_power',
-            'max_discharge': f'number.{battery_prefix}_max_discharge_power',
-            'force_charge': f'number.{battery_prefix}_forcible_charge_power',
-            'force_discharge': f'number.{battery_prefix}_forcible_discharge_power',
-            'force_mode': f'select.{battery_prefix}_forcible_chargedischarge'
-        }
+    @staticmethod
+    def get_battery_sensor_names(battery_prefix: str) -> Dict[str, str]:
+        """Get sensor names for a specific battery (built once per prefix, don't modify)"""
+        return _get_sensor_names(battery_prefix)
+    
+    def make_battery_state(self, battery_prefix: str, soc: float, remaining_kwh: float, total_kwh: float,
+                           max_charge_w: float, max_discharge_w: float, inverter_state: str = "Sleep") -> Dict[str, Dict[str, str]]:
+        """Build the initial states of one available, idle battery"""
+        return _battery_state(battery_prefix, soc, remaining_kwh, total_kwh,
+                              max_charge_w, max_discharge_w, inverter_state)
     
     def setup_realistic_battery_states(self) -> None:
         """Set up realistic initial battery states for all configured batteries"""
-        battery_states = {}
-        
-        # Battery 1 - 75% SoC, 5kWh capacity, available
-        battery1_sensors = self.get_battery_sensor_names('battery1')
-        battery_states.update({
-            battery1_sensors['soc']: {"state": "75.0"},
-            battery1_sensors['remaining']: {"state": "3.75"},
-            battery1_sensors['total']: {"state": "5.0"},
-            battery1_sensors['power']: {"state": "0"},
-            battery1_sensors['state']: {"state": "Sleep"},
-            battery1_sensors['control']: {"state": "enable"},
-            battery1_sensors['max_charge']: {"state": "2500"},
-            battery1_sensors['max_discharge']: {"state": "2500"}
-        })
-        
-        # Battery 2 - 60% SoC, 10kWh capacity, available
-        battery2_sensors = self.get_battery_sensor_names('battery2')
-        battery_states.update({
-            battery2_sensors['soc']: {"state": "60.0"},
-            battery2_sensors['remaining']: {"state": "6.0"},
-            battery2_sensors['total']: {"state": "10.0"},
-            battery2_sensors['power']: {"state": "0"},
-            battery2_sensors['state']: {"state": "Standby"},
-            battery2_sensors['control']: {"state": "enable"},
-            battery2_sensors['max_charge']: {"state": "5000"},
-            battery2_sensors['max_discharge']: {"state": "5000"}
-        })
-        
-        # Battery 3 - 85% SoC, 5kWh capacity, available
-        battery3_sensors = self.get_battery_sensor_names('battery3')
-        battery_states.update({
-            battery3_sensors['soc']: {"state": "85.0"},
-            battery3_sensors['remaining']: {"state": "4.25"},
-            battery3_sensors['total']: {"state": "5.0"},
-            battery3_sensors['power']: {"state": "0"},
-            battery3_sensors['state']: {"state": "Idle"},
-            battery3_sensors['control']: {"state": "enable"},
-            battery3_sensors['max_charge']: {"state": "2500"},
-            battery3_sensors['max_discharge']: {"state": "2500"}
-        })
-        
-        # Control entities
-        battery_states.update({
-            'input_number.battery_manager_target_power': {"state": "0"},
-            'input_boolean.battery_manager_enabled': {"state": "on"}
-        })
-        
-        self.set_initial_states(battery_states)
+        self.set_initial_states(_copy_states(_REALISTIC_STATES))
     
     def simulate_power_request(self, target_power: float) -> None:
         """Simulate a power request through the target power entity"""
@@ -122,13 +159,21 @@ class BatteryManagerIntegrationTest(IntegrationTestBase):
         if delay_seconds > 0:
             self.advance_time(int(delay_seconds))
         
-        power_sensor = f'sensor.{battery_prefix}_ac_power'
-        self.simulate_sensor_update(power_sensor, str(actual_power))
+        self.simulate_sensor_update(_get_sensor_names(battery_prefix)['power'], str(actual_power))
+    
+    def simulate_battery_responses(self, actual_power_by_battery: Dict[str, float]) -> None:
+        """Simulate several batteries responding to power commands at once
+        
+        The power sensors are written straight into the mock state without
+        dispatching a sensor update per battery - the Battery Manager doesn't
+        listen to them and reads them on the next update cycle.
+        """
+        for battery_prefix, actual_power in actual_power_by_battery.items():
+            self.mock.set_state(_get_sensor_names(battery_prefix)['power'], str(actual_power))
     
     def simulate_battery_state_change(self, battery_prefix: str, new_state: str) -> None:
         """Simulate a battery state change (e.g., Sleep -> Charge -> Discharge)"""
-        state_sensor = f'sensor.{battery_prefix}_inverter_state'
-        self.simulate_sensor_update(state_sensor, new_state)
+        self.simulate_sensor_update(_get_sensor_names(battery_prefix)['state'], new_state)
     
     def simulate_battery_unavailable(self, battery_prefix: str) -> None:
         """Simulate a battery becoming unavailable (fault state)"""
@@ -140,15 +185,13 @@ class BatteryManagerIntegrationTest(IntegrationTestBase):
     
     def get_battery_actual_power(self, battery_prefix: str) -> float:
         """Get actual power from a specific battery"""
-        power_sensor = f'sensor.{battery_prefix}_ac_power'
-        power_str = self.get_sensor_value(power_sensor)
+        power_str = self.get_sensor_value(_get_sensor_names(battery_prefix)['power'])
         return float(power_str) if power_str else 0.0
     
     def get_combined_actual_power(self) -> float:
         """Get combined actual power from all batteries"""
         total_power = 0.0
-        for battery_config in self.get_default_config()['batteries']:
-            prefix = battery_config['device_prefix']
+        for prefix in _BATTERY_PREFIXES:
             total_power += self.get_battery_actual_power(prefix)
         return total_power
     
@@ -170,25 +213,36 @@ class BatteryManagerIntegrationTest(IntegrationTestBase):
         assert abs(actual_total - expected_total) <= tolerance, \
             f"Total power: expected {expected_total}W, got {actual_total}W (tolerance: {tolerance}W)"
     
+    def get_service_calls_for(self, service: str, battery_prefix: str) -> List[Dict[str, Any]]:
+        """Get the recorded calls of a service that target a specific battery"""
+        return [call for call in self.get_service_calls(service)
+                if battery_prefix in _BATTERY_PREFIX_RE.findall(str(call.get("kwargs", {}).get("entity_id", "")))]
+    
     def assert_battery_service_called(self, battery_prefix: str, service: str, expected_params: Dict[str, Any]) -> None:
         """Assert that a specific battery service was called with expected parameters"""
-        service_calls = self.get_service_calls(service)
-        
-        # Find calls that match the battery and parameters
-        matching_calls = []
-        for call in service_calls:
-            call_kwargs = call.get("kwargs", {})
-            entity_id = call_kwargs.get("entity_id", "")
-            
-            # Check if this call is for the specified battery
-            if battery_prefix in entity_id:
-                # Check if all expected parameters match
-                if all(call_kwargs.get(k) == v for k, v in expected_params.items()):
-                    matching_calls.append(call)
+        # Find calls for the specified battery where all expected parameters match
+        matching_calls = [call for call in self.get_service_calls_for(service, battery_prefix)
+                          if all(call.get("kwargs", {}).get(k) == v for k, v in expected_params.items())]
         
         assert len(matching_calls) > 0, \
             f"Service {service} should have been called for {battery_prefix} with {expected_params}"
     
+    def assert_batteries_service_called(self, battery_prefixes: List[str], service: str, expected_params: Optional[Dict[str, Any]] = None) -> None:
+        """Assert that a service was called for each of the given batteries with expected parameters
+        
+        Scans the recorded calls once instead of once per battery.
+        """
+        expected_items = (expected_params or {}).items()
+        called_prefixes = set()
+        for call in self.get_service_calls(service):
+            call_kwargs = call.get("kwargs", {})
+            if all(call_kwargs.get(k) == v for k, v in expected_items):
+                called_prefixes.update(_BATTERY_PREFIX_RE.findall(str(call_kwargs.get("entity_id", ""))))
+        
+        missing_prefixes = set(battery_prefixes) - called_prefixes
+        assert not missing_prefixes, \
+            f"Service {service} should have been called for {sorted(missing_prefixes)} with {expected_params}"
+    
     def assert_manager_sensors_created(self) -> None:
         """Assert that all expected manager sensors were created"""
         expected_sensors = [
@@ -205,9 +259,7 @@ class BatteryManagerIntegrationTest(IntegrationTestBase):
     
     def assert_battery_status_sensors_created(self) -> None:
         """Assert that individual battery status sensors were created"""
-        for battery_config in self.get_default_config()['batteries']:
-            battery_name = battery_config['name'].lower()
-            sensor_id = f"sensor.battery_{battery_name}_status"
+        for sensor_id in _BATTERY_STATUS_SENSORS:
             self.assert_sensor_exists(sensor_id)
     
     def simulate_realistic_charge_scenario(self, target_power: float = 3000) -> None:
@@ -219,9 +271,7 @@ class BatteryManagerIntegrationTest(IntegrationTestBase):
         self.simulate_update_cycle()
         
         # Simulate gradual battery ramp-up over 6-8 seconds
-        config = self.get_default_config()
-        total_capacity = sum(5.0 if 'Battery1' in b['name'] or 'Battery3' in b['name'] else 10.0 
-                           for b in config['batteries'])  # 5+10+5 = 20kWh total
+        total_capacity = sum(_BATTERY_CAPACITY_KWH.values())  # 5+10+5 = 20kWh total
         
         for seconds in range(1, 9):  # 8 seconds of ramp-up
             self.advance_time(1)
@@ -229,16 +279,11 @@ class BatteryManagerIntegrationTest(IntegrationTestBase):
             # Calculate ramp progress (0.0 to 1.0)
             ramp_progress = min(seconds / 6.0, 1.0)  # 6 second ramp time
             
-            # Simulate each battery ramping up proportionally
-            for battery_config in config['batteries']:
-                prefix = battery_config['device_prefix']
-                capacity = 5.0 if 'battery1' in prefix or 'battery3' in prefix else 10.0
-                
-                # Proportional power allocation
-                battery_target = target_power * (capacity / total_capacity)
-                battery_actual = battery_target * ramp_progress
-                
-                self.simulate_battery_response(prefix, battery_actual)
+            # Simulate each battery ramping up proportionally to its capacity
+            self.simulate_battery_responses({
+                prefix: target_power * (capacity / total_capacity) * ramp_progress
+                for prefix, capacity in _BATTERY_CAPACITY_KWH.items()
+            })
             
             # Trigger periodic update
             self.simulate_update_cycle()
@@ -248,10 +293,20 @@ class BatteryManagerIntegrationTest(IntegrationTestBase):
         self.simulate_realistic_charge_scenario(target_power)  # Same logic, different sign
     
     def wait_for_response_monitoring_period(self) -> None:
-        """Wait for the 10-second response monitoring period"""
+        """Wait for the 10-second response monitoring period on the mock clock (no real sleep)"""
         self.advance_time(10)
         self.simulate_update_cycle()
     
+    def assert_logs_contain(self, *expected_messages: str) -> None:
+        """Assert that all expected messages were logged, reporting every missing one at once"""
+        missing_messages = []
+        for message in expected_messages:
+            try:
+                self.assert_log_contains(message)
+            except AssertionError:
+                missing_messages.append(message)
+        assert not missing_messages, f"Expected log messages not found: {missing_messages}"
+    
     def assert_system_status(self, expected_status: str) -> None:
         """Assert the system status matches expected value"""
         actual_status = self.get_sensor_value("sensor.battery_manager_status")
@@ -0,0 +1,68 @@
+"""
+Battery Manager Test Fixtures
+
+Shared pytest fixtures for the Battery Manager integration tests.
+"""
+
+import pytest
+import sys
+import os
+
+# Add the apps directory to Python path (once - conftest.py is loaded before the test modules)
+APPS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if APPS_DIR not in sys.path:
+    sys.path.insert(0, APPS_DIR)
+
+from battery_manager.battery_manager import BatteryManager
+from .battery_manager_integration_base import BatteryManagerIntegrationTest
+
+
+def pytest_configure(config):
+    """Register custom markers used by the Battery Manager tests"""
+    # Also known without pytest-xdist installed, where the marker is a no-op
+    config.addinivalue_line("markers", "xdist_group(name): run all tests of the group on one pytest-xdist worker")
+    # Deselect with `pytest -m "not slow"` for a quick local run
+    config.addinivalue_line("markers", "slow: multi-cycle simulation tests")
+
+
+def _setup_battery_manager_app(config: dict) -> BatteryManagerIntegrationTest:
+    """Set up a BatteryManagerIntegrationTest app"""
+    test_base = BatteryManagerIntegrationTest()
+    test_base.setup_app(BatteryManager, config)
+    return test_base
+
+
+@pytest.fixture(scope="session")
+def default_config():
+    """Pytest fixture that provides the default Battery Manager config, built once per session
+    
+    The Battery Manager only reads its args, so all test apps can share it.
+    """
+    return BatteryManagerIntegrationTest().get_default_config()
+
+
+@pytest.fixture
+def battery_manager_test(default_config):
+    """Pytest fixture that provides a fresh BatteryManagerIntegrationTest app with realistic battery states for each test
+    
+    Each test gets its own app and mock, so listeners, scheduled callbacks and
+    the mock clock from earlier tests can't leak into it.
+    """
+    test_base = _setup_battery_manager_app(default_config)
+    test_base.setup_realistic_battery_states()
+    yield test_base
+    test_base.teardown_app()
+
+
+@pytest.fixture(scope="module")
+def initialized_battery_manager(default_config):
+    """Pytest fixture that provides one initialized Battery Manager per module for read-only tests
+    
+    Tests using it share the app with realistic battery states and must not change
+    its state beyond running update cycles.
+    """
+    test_base = _setup_battery_manager_app(default_config)
+    test_base.setup_realistic_battery_states()
+    test_base.initialize_app()
+    yield test_base
+    test_base.teardown_app()
@@ -8,36 +8,43 @@ These tests consolidate and replace all previous battery manager tests,
 focusing on actual functionality rather than setup.
 """
 
+import logging
 import pytest
-import sys
-import os
 
-# Add the apps directory to Python path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
-from battery_manager.battery_manager import BatteryManager
 from .battery_manager_integration_base import BatteryManagerIntegrationTest
 
+logger = logging.getLogger(__name__)
+
+# Sensor names of all test batteries, looked up once: prefix -> {key: entity_id}
+SENSORS = {prefix: BatteryManagerIntegrationTest.get_battery_sensor_names(prefix)
+           for prefix in ('battery1', 'battery2', 'battery3')}
+
+# The module-scoped initialized_battery_manager app is per worker process; with `pytest -n auto --dist loadgroup`
+# keep this module on one pytest-xdist worker so that app is only set up once
+pytestmark = pytest.mark.xdist_group("battery_manager")
+
 
-@pytest.fixture
-def battery_manager_test():
-    """Pytest fixture that provides a fresh BatteryManagerIntegrationTest instance for each test"""
-    test_base = BatteryManagerIntegrationTest()
-    test_base.setup_app(BatteryManager, test_base.get_default_config())
-    yield test_base
-    test_base.teardown_app()
+# (target power, force mode, expected power per battery) - proportional to capacity (5/10/5 kWh)
+POWER_DISTRIBUTION_CASES = [
+    # 3000W charge: 3000W * (5/20), 3000W * (10/20), 3000W * (5/20)
+    (3000, 'charge', {'battery1': 750, 'battery2': 1500, 'battery3': 750}),
+    # -2000W discharge: -500W, -1000W, -500W (negative power = discharge)
+    (-2000, 'discharge', {'battery1': 500, 'battery2': 1000, 'battery3': 500}),
+]
+
+# (target power, SoC of Battery1/Battery3, force mode) - Battery2 at 60% has to take the full request
+SOC_LIMITED_CASES = [
+    (2000, 100.0, 'charge'),     # Full batteries can't charge
+    (-2000, 5.0, 'discharge'),   # Empty batteries (at MIN_DISCHARGE_SOC) can't discharge
+]
 
 
 class TestBatteryManagerIntegration:
     """Integration tests for Battery Manager using complete application workflows"""
     
-    def test_complete_application_initialization(self, battery_manager_test):
+    def test_complete_application_initialization(self, initialized_battery_manager):
         """Test complete application initialization and sensor creation"""
-        # Set up realistic initial states
-        battery_manager_test.setup_realistic_battery_states()
-        
-        # Initialize the application
-        battery_manager_test.initialize_app()
+        battery_manager_test = initialized_battery_manager
         
         # Verify all manager sensors were created
         battery_manager_test.assert_manager_sensors_created()
@@ -56,89 +63,37 @@ class TestBatteryManagerIntegration:
         # Verify initialization log message
         battery_manager_test.assert_log_contains("Battery Manager initialized with 3 batteries")
     
-    def test_proportional_power_distribution(self, battery_manager_test):
+    @pytest.mark.parametrize("target_power, mode, expected_power", POWER_DISTRIBUTION_CASES,
+                             ids=["charge", "discharge"])
+    def test_power_distribution(self, battery_manager_test, target_power, mode, expected_power):
         """Test that power is distributed proportionally based on battery capacity"""
-        # Set up realistic battery states
-        battery_manager_test.setup_realistic_battery_states()
         battery_manager_test.initialize_app()
         
         # Clear initial logs
         battery_manager_test.clear_log_messages()
         
-        # Request 3000W total power (should distribute as 750W, 1500W, 750W)
-        target_power = 3000
         battery_manager_test.simulate_power_request(target_power)
         
         # Trigger update cycle to process the request
         battery_manager_test.simulate_update_cycle()
         
         # Verify power distribution service calls were made
-        # Battery1 (5kWh): 3000W * (5/20) = 750W
-        battery_manager_test.assert_battery_service_called(
-            'battery1', 'number/set_value',
-            {'entity_id': 'number.battery1_forcible_charge_power', 'value': 750}
-        )
-        
-        # Battery2 (10kWh): 3000W * (10/20) = 1500W
-        battery_manager_test.assert_battery_service_called(
-            'battery2', 'number/set_value',
-            {'entity_id': 'number.battery2_forcible_charge_power', 'value': 1500}
-        )
-        
-        # Battery3 (5kWh): 3000W * (5/20) = 750W
-        battery_manager_test.assert_battery_service_called(
-            'battery3', 'number/set_value',
-            {'entity_id': 'number.battery3_forcible_charge_power', 'value': 750}
-        )
-        
-        # Verify charge mode was set for all batteries (positive power = charge in this context)
-        for prefix in ['battery1', 'battery2', 'battery3']:
+        for prefix, power in expected_power.items():
             battery_manager_test.assert_battery_service_called(
-                prefix, 'select/select_option',
-                {'entity_id': f'select.{prefix}_forcible_charge_discharge', 'option': 'charge'}
+                prefix, 'number/set_value',
+                {'entity_id': SENSORS[prefix][f'force_{mode}'], 'value': power}
             )
         
-        battery_manager_test.assert_no_errors_logged()
-    
-    def test_charging_power_distribution(self, battery_manager_test):
-        """Test charging power distribution (negative power values)"""
-        battery_manager_test.setup_realistic_battery_states()
-        battery_manager_test.initialize_app()
-        battery_manager_test.clear_log_messages()
-        
-        # Request -2000W (charging)
-        target_power = -2000
-        battery_manager_test.simulate_power_request(target_power)
-        battery_manager_test.simulate_update_cycle()
-        
-        # Verify discharge power distribution: -500W, -1000W, -500W (negative power = discharge)
-        battery_manager_test.assert_battery_service_called(
-            'battery1', 'number/set_value',
-            {'entity_id': 'number.battery1_forcible_discharge_power', 'value': 500}
+        # Verify the force mode was set for all batteries
+        battery_manager_test.assert_batteries_service_called(
+            list(expected_power), 'select/select_option', {'option': mode}
         )
         
-        battery_manager_test.assert_battery_service_called(
-            'battery2', 'number/set_value',
-            {'entity_id': 'number.battery2_forcible_discharge_power', 'value': 1000}
-        )
-        
-        battery_manager_test.assert_battery_service_called(
-            'battery3', 'number/set_value',
-            {'entity_id': 'number.battery3_forcible_discharge_power', 'value': 500}
-        )
-        
-        # Verify discharge mode was set
-        for prefix in ['battery1', 'battery2', 'battery3']:
-            battery_manager_test.assert_battery_service_called(
-                prefix, 'select/select_option',
-                {'entity_id': f'select.{prefix}_forcible_charge_discharge', 'option': 'discharge'}
-            )
-        
         battery_manager_test.assert_no_errors_logged()
     
+    @pytest.mark.slow
     def test_realistic_battery_response_lifecycle(self, battery_manager_test):
         """Test complete lifecycle with realistic battery responses"""
-        battery_manager_test.setup_realistic_battery_states()
         battery_manager_test.initialize_app()
         battery_manager_test.clear_log_messages()
         
@@ -162,9 +117,9 @@ class TestBatteryManagerIntegration:
         
         battery_manager_test.assert_no_errors_logged()
     
+    @pytest.mark.slow
     def test_battery_underperformance_scenario(self, battery_manager_test):
         """Test scenario where one battery underperforms (partial response)"""
-        battery_manager_test.setup_realistic_battery_states()
         battery_manager_test.initialize_app()
         battery_manager_test.clear_log_messages()
         
@@ -174,9 +129,11 @@ class TestBatteryManagerIntegration:
         battery_manager_test.simulate_update_cycle()
         
         # Simulate normal response for battery1 and battery2, underperformance for battery3
-        battery_manager_test.simulate_battery_response('battery1', 750)  # Normal: 750W
-        battery_manager_test.simulate_battery_response('battery2', 1500)  # Normal: 1500W
-        battery_manager_test.simulate_battery_response('battery3', 450)  # Underperforming: 450W instead of 750W
+        battery_manager_test.simulate_battery_responses({
+            'battery1': 750,   # Normal: 750W
+            'battery2': 1500,  # Normal: 1500W
+            'battery3': 450    # Underperforming: 450W instead of 750W
+        })
         
         # Wait for response monitoring period (10 seconds)
         battery_manager_test.wait_for_response_monitoring_period()
@@ -192,9 +149,9 @@ class TestBatteryManagerIntegration:
         # For now, we verify the underperformance is detectable
         battery_manager_test.assert_no_errors_logged()
     
+    @pytest.mark.slow
     def test_battery_failure_during_operation(self, battery_manager_test):
         """Test system response when battery becomes unavailable during operation"""
-        battery_manager_test.setup_realistic_battery_states()
         battery_manager_test.initialize_app()
         battery_manager_test.clear_log_messages()
         
@@ -227,7 +184,6 @@ class TestBatteryManagerIntegration:
     
     def test_battery_recovery_scenario(self, battery_manager_test):
         """Test system response when failed battery recovers"""
-        battery_manager_test.setup_realistic_battery_states()
         battery_manager_test.initialize_app()
         
         # Start with battery3 failed
@@ -250,17 +206,14 @@ class TestBatteryManagerIntegration:
         battery_manager_test.simulate_update_cycle()
         
         # All three batteries should receive power commands again
-        for prefix in ['battery1', 'battery2', 'battery3']:
-            service_calls = battery_manager_test.get_service_calls('number/set_value')
-            battery_calls = [call for call in service_calls 
-                           if prefix in call.get('kwargs', {}).get('entity_id', '')]
-            assert len(battery_calls) > 0, f"Battery {prefix} should receive power commands after recovery"
+        battery_manager_test.assert_batteries_service_called(
+            ['battery1', 'battery2', 'battery3'], 'number/set_value'
+        )
         
         battery_manager_test.assert_no_errors_logged()
     
     def test_system_disable_enable_cycle(self, battery_manager_test):
         """Test disabling and re-enabling the battery manager"""
-        battery_manager_test.setup_realistic_battery_states()
         battery_manager_test.initialize_app()
         battery_manager_test.clear_log_messages()
         
@@ -290,13 +243,14 @@ class TestBatteryManagerIntegration:
         # System should return to active state
         battery_manager_test.assert_system_status("active")
         
-        battery_manager_test.assert_log_contains("Battery Manager disabled - reset to safe state")
-        battery_manager_test.assert_log_contains("Battery Manager enabled - reset to safe state")
+        battery_manager_test.assert_logs_contain(
+            "Battery Manager disabled - reset to safe state",
+            "Battery Manager enabled - reset to safe state"
+        )
         battery_manager_test.assert_no_errors_logged()
     
     def test_zero_power_request(self, battery_manager_test):
         """Test system behavior with zero power request"""
-        battery_manager_test.setup_realistic_battery_states()
         battery_manager_test.initialize_app()
         battery_manager_test.clear_log_messages()
         
@@ -307,15 +261,14 @@ class TestBatteryManagerIntegration:
         # All batteries should be set to stop mode (but they're already in stop mode from initialization)
         # The logs show "already stop, skipping" so no service calls are made
         # This is correct behavior - verify no errors occurred
-        battery_manager_test.assert_log_contains("Applied Battery1: 0W")
-        battery_manager_test.assert_log_contains("Applied Battery2: 0W")
-        battery_manager_test.assert_log_contains("Applied Battery3: 0W")
+        battery_manager_test.assert_logs_contain(
+            "Applied Battery1: 0W", "Applied Battery2: 0W", "Applied Battery3: 0W"
+        )
         
         battery_manager_test.assert_no_errors_logged()
     
     def test_power_limit_enforcement(self, battery_manager_test):
         """Test that individual battery power limits are respected"""
-        battery_manager_test.setup_realistic_battery_states()
         battery_manager_test.initialize_app()
         battery_manager_test.clear_log_messages()
         
@@ -327,24 +280,18 @@ class TestBatteryManagerIntegration:
         # Verify batteries are not commanded beyond their limits
         # Battery1 & Battery3: max 2500W each
         # Battery2: max 5000W
-        service_calls = battery_manager_test.get_service_calls('number/set_value')
-        
-        for call in service_calls:
-            kwargs = call.get('kwargs', {})
-            entity_id = kwargs.get('entity_id', '')
-            value = kwargs.get('value', 0)
-            
-            if 'battery1' in entity_id or 'battery3' in entity_id:
-                assert value <= 2500, f"Battery1/3 should not exceed 2500W, got {value}W for {entity_id}"
-            elif 'battery2' in entity_id:
-                assert value <= 5000, f"Battery2 should not exceed 5000W, got {value}W for {entity_id}"
+        for prefix, max_power in (('battery1', 2500), ('battery2', 5000), ('battery3', 2500)):
+            for call in battery_manager_test.get_service_calls_for('number/set_value', prefix):
+                kwargs = call.get('kwargs', {})
+                value = kwargs.get('value', 0)
+                assert value <= max_power, \
+                    f"{prefix} should not exceed {max_power}W, got {value}W for {kwargs.get('entity_id')}"
         
         battery_manager_test.assert_no_errors_logged()
     
-    def test_combined_soc_calculation(self, battery_manager_test):
+    def test_combined_soc_calculation(self, initialized_battery_manager):
         """Test that combined SoC is calculated correctly"""
-        battery_manager_test.setup_realistic_battery_states()
-        battery_manager_test.initialize_app()
+        battery_manager_test = initialized_battery_manager
         
         # Trigger sensor updates
         battery_manager_test.simulate_update_cycle()
@@ -363,9 +310,9 @@ class TestBatteryManagerIntegration:
         
         battery_manager_test.assert_no_errors_logged()
     
+    @pytest.mark.slow
     def test_periodic_updates_and_monitoring(self, battery_manager_test):
         """Test that periodic updates work correctly"""
-        battery_manager_test.setup_realistic_battery_states()
         battery_manager_test.initialize_app()
         battery_manager_test.clear_log_messages()
         
@@ -391,7 +338,6 @@ class TestBatteryManagerIntegration:
     
     def test_charge_discharge_transition(self, battery_manager_test):
         """Test smooth transition from charging to discharging"""
-        battery_manager_test.setup_realistic_battery_states()
         battery_manager_test.initialize_app()
         battery_manager_test.clear_log_messages()
         
@@ -420,202 +366,58 @@ class TestBatteryManagerIntegration:
         
         battery_manager_test.assert_no_errors_logged()
     
-    def test_full_batteries_power_redistribution_bug(self, battery_manager_test):
+    @pytest.mark.parametrize("target_power, excluded_soc, mode", SOC_LIMITED_CASES,
+                             ids=["full_batteries_charge", "empty_batteries_discharge"])
+    def test_soc_limited_batteries_power_redistribution(self, battery_manager_test, target_power, excluded_soc, mode):
         """
-        Test for proper power redistribution when batteries are at 100% SoC
-        
-        Real scenario from user:
-        - Akku1 (Battery1) at 100% SoC - should not be assigned charge power
-        - Akku2 (Battery2) at 60% SoC - should get all available charge power
-        - Akku3 (Battery3) at 100% SoC - should not be assigned charge power
-        - System requests charge power
-        
-        Expected behavior:
-        1. System should detect batteries at 100% SoC
-        2. System should NOT assign charge power to full batteries
-        3. System should redistribute all power to available batteries (Battery2)
-        4. Battery2 should get the full 2000W instead of just its proportional share
-        
-        Current bug: System assigns power proportionally without considering SoC,
-        causing power loss when full batteries can't accept charge power.
-        """
-        # Set up scenario matching the real bug report
-        battery_states = {}
-        
-        # Battery1 - 100% SoC, cannot accept charge power
-        battery1_sensors = battery_manager_test.get_battery_sensor_names('battery1')
-        battery_states.update({
-            battery1_sensors['soc']: {"state": "100.0"},
-            battery1_sensors['remaining']: {"state": "5.0"},  # Full capacity
-            battery1_sensors['total']: {"state": "5.0"},
-            battery1_sensors['power']: {"state": "0"},
-            battery1_sensors['state']: {"state": "Sleep"},
-            battery1_sensors['control']: {"state": "enable"},
-            battery1_sensors['max_charge']: {"state": "2500"},
-            battery1_sensors['max_discharge']: {"state": "2500"}
-        })
+        Test that power is redistributed when batteries can't take it due to SoC
         
-        # Battery2 - 60% SoC, can accept charge power
-        battery2_sensors = battery_manager_test.get_battery_sensor_names('battery2')
-        battery_states.update({
-            battery2_sensors['soc']: {"state": "60.0"},
-            battery2_sensors['remaining']: {"state": "6.0"},
-            battery2_sensors['total']: {"state": "10.0"},
-            battery2_sensors['power']: {"state": "0"},
-            battery2_sensors['state']: {"state": "Standby"},
-            battery2_sensors['control']: {"state": "enable"},
-            battery2_sensors['max_charge']: {"state": "5000"},
-            battery2_sensors['max_discharge']: {"state": "5000"}
-        })
+        Real scenario from user (charge case):
+        - Akku1 (Battery1) and Akku3 (Battery3) at 100% SoC - can't accept charge power
+        - Akku2 (Battery2) at 60% SoC - should get all the requested power
         
-        # Battery3 - 100% SoC, cannot accept charge power
-        battery3_sensors = battery_manager_test.get_battery_sensor_names('battery3')
-        battery_states.update({
-            battery3_sensors['soc']: {"state": "100.0"},
-            battery3_sensors['remaining']: {"state": "5.0"},  # Full capacity
-            battery3_sensors['total']: {"state": "5.0"},
-            battery3_sensors['power']: {"state": "0"},
-            battery3_sensors['state']: {"state": "Idle"},
-            battery3_sensors['control']: {"state": "enable"},
-            battery3_sensors['max_charge']: {"state": "2500"},
-            battery3_sensors['max_discharge']: {"state": "2500"}
-        })
-        
-        # Control entities
-        battery_states.update({
+        Full batteries must not be assigned charge power (and empty batteries no
+        discharge power); Battery2 has to take the full request instead of just
+        its proportional share, otherwise that power is lost.
+        """
+        excluded_remaining = 5.0 * excluded_soc / 100
+        battery_manager_test.set_initial_states({
+            **battery_manager_test.make_battery_state('battery1', excluded_soc, excluded_remaining, 5.0, 2500, 2500),
+            **battery_manager_test.make_battery_state('battery2', 60.0, 6.0, 10.0, 5000, 5000, "Standby"),
+            **battery_manager_test.make_battery_state('battery3', excluded_soc, excluded_remaining, 5.0, 2500, 2500, "Idle"),
             'input_number.battery_manager_target_power': {"state": "0"},
             'input_boolean.battery_manager_enabled': {"state": "on"}
         })
-        
-        battery_manager_test.set_initial_states(battery_states)
         battery_manager_test.initialize_app()
         battery_manager_test.clear_log_messages()
         
-        # Request charge power (positive value means charging in this context)
-        target_power = 2000  # 2kW charge request
         battery_manager_test.simulate_power_request(target_power)
         battery_manager_test.simulate_update_cycle()
         
-        # Let the system run for a few cycles to see the natural behavior
-        # Simulate realistic battery responses over time
-        for cycle in range(5):
-            battery_manager_test.advance_time(2)  # 2 second intervals
-            
-            # Batteries at 100% SoC naturally cannot accept charge power
-            # They should report 0W actual power when commanded to charge
-            battery_manager_test.simulate_battery_response('battery1', 0)  # Full battery can't charge
-            battery_manager_test.simulate_battery_response('battery3', 0)  # Full battery can't charge
-            
-            # Battery2 should be able to charge, but let's see what the system actually commands
-            # For now, let's simulate it responding normally to whatever it's commanded
-            battery2_commanded_power = 0
-            
-            # Check what power was commanded to Battery2
-            service_calls = battery_manager_test.get_service_calls('number/set_value')
-            battery2_calls = [call for call in service_calls
-                            if 'battery2' in call.get('kwargs', {}).get('entity_id', '')]
-            
-            if battery2_calls:
-                latest_call = battery2_calls[-1]
-                battery2_commanded_power = latest_call['kwargs']['value']
-                
-                # Simulate Battery2 responding to the command
-                # If it's a charge command, it should charge
-                # If it's a discharge command, it should discharge
-                if 'charge' in latest_call['kwargs']['entity_id']:
-                    battery_manager_test.simulate_battery_response('battery2', battery2_commanded_power)
-                elif 'discharge' in latest_call['kwargs']['entity_id']:
-                    battery_manager_test.simulate_battery_response('battery2', -battery2_commanded_power)
-            
-            battery_manager_test.simulate_update_cycle()
-            
-            # Log the current state
-            battery2_actual = battery_manager_test.get_battery_actual_power('battery2')
-            total_actual = battery_manager_test.get_combined_actual_power()
-            
-            print(f"Cycle {cycle+1}: Battery2 commanded={battery2_commanded_power}W, actual={battery2_actual}W, total={total_actual}W")
-        
-        # After several cycles, check the final state
-        final_battery2_power = battery_manager_test.get_battery_actual_power('battery2')
-        final_total_power = battery_manager_test.get_combined_actual_power()
-        
-        print(f"\nFinal state:")
-        print(f"Battery1 power: {battery_manager_test.get_battery_actual_power('battery1')}W")
-        print(f"Battery2 power: {final_battery2_power}W")
-        print(f"Battery3 power: {battery_manager_test.get_battery_actual_power('battery3')}W")
-        print(f"Total actual power: {final_total_power}W")
-        print(f"Target power: {target_power}W")
-        print(f"Power shortfall: {target_power - final_total_power}W")
-        
-        # Check all service calls to understand what happened
-        all_service_calls = battery_manager_test.get_service_calls()
-        print(f"\nAll service calls made:")
-        for call in all_service_calls:
-            if 'battery' in call.get('kwargs', {}).get('entity_id', ''):
-                print(f"  {call['service']}: {call['kwargs']}")
-        
-        # Expected behavior analysis:
-        # When batteries are at 100% SoC, the system should:
-        # 1. NOT assign any charge power to full batteries (Battery1 and Battery3)
-        # 2. Redistribute ALL available power to batteries that can charge (Battery2)
-        # 3. Battery2 should get the full 2000W, not just its proportional 1000W
-        
-        expected_battery1_power = 0  # Full battery should get 0W
-        expected_battery3_power = 0  # Full battery should get 0W
-        expected_battery2_power = target_power  # Should get ALL the power (2000W)
-        
-        battery1_actual = battery_manager_test.get_battery_actual_power('battery1')
-        battery3_actual = battery_manager_test.get_battery_actual_power('battery3')
-        
-        # Check if the system properly handles full batteries
-        if battery1_actual == expected_battery1_power and battery3_actual == expected_battery3_power:
-            print(f"\n✅ CORRECT: Full batteries (Battery1, Battery3) correctly assigned 0W")
-        else:
-            print(f"\n❌ BUG: Full batteries still assigned power - Battery1: {battery1_actual}W, Battery3: {battery3_actual}W")
-        
-        # Check if Battery2 gets the full available power
-        if abs(final_battery2_power - expected_battery2_power) < 100:  # Within 100W tolerance
-            print(f"✅ CORRECT: Battery2 gets full available power ({final_battery2_power}W ≈ {expected_battery2_power}W)")
-        else:
-            print(f"❌ BUG: Battery2 only gets {final_battery2_power}W, should get {expected_battery2_power}W")
-            print("This is the core bug - power is lost instead of being redistributed")
-        
-        # Check total power efficiency
-        power_efficiency = (final_total_power / target_power) * 100
-        if power_efficiency >= 95:  # At least 95% efficiency
-            print(f"✅ SYSTEM WORKING: {power_efficiency:.1f}% power efficiency")
-        else:
-            print(f"❌ POWER LOSS BUG: Only {power_efficiency:.1f}% efficiency - {target_power - final_total_power}W lost")
-        
-        # The fix should implement SoC-aware power distribution:
-        # 1. Check battery SoC before assigning charge power
-        # 2. Skip batteries at 100% SoC for charging (but keep them available for discharging)
-        # 3. Redistribute skipped power among available batteries
-        # 4. Ensure total requested power is achieved when possible
-        
-        print(f"\nSUMMARY:")
-        print(f"Target: {target_power}W, Actual: {final_total_power}W, Efficiency: {power_efficiency:.1f}%")
-        print(f"Battery1 (100% SoC): {battery1_actual}W (should be 0W)")
-        print(f"Battery2 (60% SoC): {final_battery2_power}W (should be {expected_battery2_power}W)")
-        print(f"Battery3 (100% SoC): {battery3_actual}W (should be 0W)")
-        
-        # ACTUAL ASSERTIONS - This is what was missing!
-        # Full batteries (100% SoC) should not receive charge power
-        assert battery1_actual == expected_battery1_power, \
-            f"Battery1 at 100% SoC should get 0W, but got {battery1_actual}W"
-        assert battery3_actual == expected_battery3_power, \
-            f"Battery3 at 100% SoC should get 0W, but got {battery3_actual}W"
-        
-        # Battery2 should get the full redistributed power
-        assert abs(final_battery2_power - expected_battery2_power) < 100, \
-            f"Battery2 should get full power ({expected_battery2_power}W), but only got {final_battery2_power}W"
-        
-        # Total power should achieve target (within tolerance)
-        assert power_efficiency >= 95, \
-            f"System should achieve ≥95% efficiency, but only got {power_efficiency:.1f}% ({final_total_power}W out of {target_power}W)"
+        # Batteries excluded due to SoC must not be commanded any power
+        for prefix in ('battery1', 'battery3'):
+            battery_calls = battery_manager_test.get_service_calls_for('number/set_value', prefix)
+            assert not battery_calls, f"{prefix} at {excluded_soc}% SoC should not get {mode} power, got {battery_calls}"
+        
+        # Battery2 takes the whole request
+        battery_manager_test.assert_battery_service_called(
+            'battery2', 'number/set_value',
+            {'entity_id': SENSORS['battery2'][f'force_{mode}'], 'value': abs(target_power)}
+        )
+        
+        # With Battery2 responding, the full target power is achieved
+        battery_manager_test.simulate_battery_response('battery2', target_power)
+        battery_manager_test.simulate_update_cycle()
+        
+        assert battery_manager_test.get_battery_actual_power('battery1') == 0
+        assert battery_manager_test.get_battery_actual_power('battery3') == 0
+        total_power = battery_manager_test.get_combined_actual_power()
+        logger.debug("SoC-limited %s: target=%sW, total=%sW, battery2 calls=%s", mode, target_power, total_power,
+                     battery_manager_test.get_service_calls_for('number/set_value', 'battery2'))
+        assert abs(total_power - target_power) < 100, \
+            f"Total power should be ~{target_power}W, got {total_power}W"
         
         battery_manager_test.assert_no_errors_logged()
 
-
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '-s'])
\ No newline at end of file
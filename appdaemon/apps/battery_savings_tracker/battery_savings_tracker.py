@@ -14,6 +14,9 @@ Pricing:
 
 import appdaemon.plugins.hass.hassapi as hass
 import datetime
+import json
+import os
+import traceback
 from typing import Optional, Dict, Any
 
 
@@ -22,8 +25,10 @@ class BatterySavingsTracker(hass.Hass):
     
     # Constants
     CT_TO_EUR_FACTOR = 100
-    DEFAULT_UPDATE_INTERVAL = 300  # 5 minutes
+    DEFAULT_RESET_INTERVAL = 3600  # 1 hour
+    DEFAULT_EVENT_DELAY = 60  # seconds to collect energy sensor changes into one update
     DEFAULT_PV_SURPLUS_RATE = 7.8  # ct/kWh
+    DEFAULT_SNAPSHOT_INTERVAL = 60  # seconds between snapshot file writes
     
     def initialize(self):
         """Initialize the Battery Savings Tracker"""
@@ -34,9 +39,14 @@ class BatterySavingsTracker(hass.Hass):
         self.log("Initializing Battery Savings Tracker...")
         
         # Configuration
-        self.update_interval = self.args.get('update_interval', self.DEFAULT_UPDATE_INTERVAL)
+        self.reset_interval = self.args.get('reset_interval', self.DEFAULT_RESET_INTERVAL)
+        self.event_delay = self.args.get('event_delay', self.DEFAULT_EVENT_DELAY)
         self.pv_surplus_rate_ct = self.args.get('pv_surplus_rate_ct', self.DEFAULT_PV_SURPLUS_RATE)
         
+        # Optional JSON file to restore the savings from if HA lost the sensors (e.g. after an HA restart)
+        self.snapshot_path = self.args.get('snapshot_path')
+        self.snapshot_interval = self.args.get('snapshot_interval', self.DEFAULT_SNAPSHOT_INTERVAL)
+        
         # Input sensor configuration (with defaults)
         self.battery_pv_energy_sensor = self.args.get('battery_pv_energy_sensor', 'sensor.battery_combined_pv_energy')
         self.battery_grid_energy_sensor = self.args.get('battery_grid_energy_sensor', 'sensor.battery_combined_grid_energy')
@@ -48,16 +58,42 @@ class BatterySavingsTracker(hass.Hass):
         self.grid_reset_mode = self.args.get('grid_counter_reset_mode', 'ignore_reset')
         self.discharge_reset_mode = self.args.get('discharge_counter_reset_mode', 'ignore_reset')
         
+        # Counter reset handlers by reset mode
+        self._reset_handlers = {
+            "ignore_reset": self._ignore_counter_reset,
+            "continue_from_reset": self._continue_from_counter_reset,
+            "daily_counter": self._preserve_counter_reset_delta
+        }
+        
         # Define sensor mappings
         self._define_sensors()
         
+        # Sensor attributes and running EUR totals, kept in memory so updates don't re-read HA
+        self._sensor_attrs = {}  # sensor_id -> attributes dict
+        self._sensor_values = {}  # sensor_id -> current EUR value (cumulative and time-based sensors)
+        
+        # Last Tibber price read - only converted again when Tibber publishes a new price
+        self._tibber_cache = (None, None)  # (current_price in EUR/kWh, price in ct/kWh)
+        
+        # Energy values of the last completed update (in memory only)
+        self._last_energy_snapshot = None
+        
         # Initialize all sensors
         self._create_tracking_sensors()
         
-        # Schedule periodic updates
-        self.run_every(self._update_savings, "now", self.update_interval)
+        # Periodically save the savings to the snapshot file (also saved on terminate)
+        if self.snapshot_path:
+            self._saved_snapshot = None
+            self.run_every(self._save_snapshot, f"now+{self.snapshot_interval}", self.snapshot_interval)
         
-        self.log(f"Battery Savings Tracker initialized - update interval: {self.update_interval}s")
+        # Update when the energy sensors change; the hourly update handles the
+        # daily/weekly/monthly/yearly resets (and catches any missed change)
+        self._event_update_handle = None
+        for sensor_id in (self.BATTERY_PV_ENERGY_SENSOR, self.BATTERY_GRID_ENERGY_SENSOR, self.COMBINED_DISCHARGING_SENSOR):
+            self.listen_state(self._on_energy_change, sensor_id)
+        self.run_every(self._update_savings, "now", self.reset_interval)
+        
+        self.log(f"Battery Savings Tracker initialized - reset check interval: {self.reset_interval}s")
     
     def _define_sensors(self):
         """Define all sensor entity IDs"""
@@ -84,9 +120,24 @@ class BatterySavingsTracker(hass.Hass):
         self.WEEKLY_SAVINGS_SENSOR = "sensor.battery_weekly_money_saved_eur"
         self.MONTHLY_SAVINGS_SENSOR = "sensor.battery_monthly_money_saved_eur"
         self.YEARLY_SAVINGS_SENSOR = "sensor.battery_yearly_money_saved_eur"
+        self.TIME_BASED_SENSORS = (
+            (self.DAILY_SAVINGS_SENSOR, "daily"),
+            (self.WEEKLY_SAVINGS_SENSOR, "weekly"),
+            (self.MONTHLY_SAVINGS_SENSOR, "monthly"),
+            (self.YEARLY_SAVINGS_SENSOR, "yearly")
+        )
         
         # Single reset tracking sensor (created by this app)
         self.LAST_RESET_DATE_SENSOR = "sensor.battery_savings_last_reset_date"
+        
+        # Sensors read on every savings update (the last kWh values are kept in memory)
+        self.UPDATE_INPUT_SENSORS = (
+            self.BATTERY_PV_ENERGY_SENSOR,
+            self.BATTERY_GRID_ENERGY_SENSOR,
+            self.COMBINED_DISCHARGING_SENSOR,
+            self.TIBBER_PRICE_SENSOR
+        )
+        self.LAST_KWH_SENSORS = (self.LAST_PV_KWH_SENSOR, self.LAST_GRID_KWH_SENSOR, self.LAST_DISCHARGE_KWH_SENSOR)
     
     def _create_tracking_sensors(self):
         """Create all tracking sensors with initial values"""
@@ -119,30 +170,40 @@ class BatterySavingsTracker(hass.Hass):
             self.LAST_RESET_DATE_SENSOR: ("Battery Savings Last Reset Date", "mdi:calendar-clock", "timestamp")
         }
         
+        # Read the existing states of this app's sensors once
+        states = self._read_states([*state_sensors, *cumulative_sensors, *time_based_sensors, *reset_sensor])
+        
+        # Saved values for sensors HA doesn't have (anymore)
+        snapshot = self._load_snapshot()
+        saved_values = snapshot.get("values", {})
+        
         # Create state management sensors
         for sensor_id, (friendly_name, icon, device_class) in state_sensors.items():
             unit = "kWh" if device_class == "energy" else None
-            self._create_sensor(sensor_id, "0", friendly_name, icon, device_class, unit)
+            self._create_sensor(states, sensor_id, "0", friendly_name, icon, device_class, unit)
         
-        # Create cumulative sensors
-        for sensor_id, (friendly_name, icon, state_class) in cumulative_sensors.items():
-            self._create_sensor(sensor_id, "0", friendly_name, icon, "monetary", "€", state_class)
+        # Last stored kWh values - only this app writes them, so they are read once here
+        self._last_kwh_values = tuple(self._get_sensor_value(sensor_id, states, default=0)
+                                      for sensor_id in self.LAST_KWH_SENSORS)
         
-        # Create time-based savings sensors
-        for sensor_id, (friendly_name, icon, state_class) in time_based_sensors.items():
-            self._create_sensor(sensor_id, "0", friendly_name, icon, "monetary", "€", state_class)
+        # Create cumulative and time-based savings sensors
+        for sensor_id, (friendly_name, icon, state_class) in {**cumulative_sensors, **time_based_sensors}.items():
+            initial_value = saved_values.get(sensor_id, 0)
+            initial_state = self._format_eur(initial_value) if sensor_id in saved_values else "0"
+            self._create_sensor(states, sensor_id, initial_state, friendly_name, icon, "monetary", "€", state_class)
+            self._sensor_values[sensor_id] = self._get_sensor_value(sensor_id, states, default=initial_value)
         
         # Create reset tracking sensor
         for sensor_id, (friendly_name, icon, device_class) in reset_sensor.items():
-            self._create_sensor(sensor_id, "0", friendly_name, icon, device_class)
+            self._create_sensor(states, sensor_id, snapshot.get("last_reset_date", "0"), friendly_name, icon, device_class)
         
         # Initialize time-based tracking
-        self._initialize_time_based_tracking()
+        self._initialize_time_based_tracking(states, snapshot.get("last_reset_date"))
     
-    def _create_sensor(self, sensor_id: str, initial_state: str, friendly_name: str,
+    def _create_sensor(self, states: Dict[str, Any], sensor_id: str, initial_state: str, friendly_name: str,
                       icon: str, device_class: str, unit: str = None, state_class: str = None):
-        """Create a single sensor if it doesn't exist"""
-        if not self.entity_exists(sensor_id):
+        """Create a single sensor if it isn't in the read states and cache its attributes"""
+        if sensor_id not in states:
             attributes = {
                 "friendly_name": friendly_name,
                 "icon": icon,
@@ -155,34 +216,107 @@ class BatterySavingsTracker(hass.Hass):
                 
             self.set_state(sensor_id, state=initial_state, attributes=attributes)
             self.log(f"Created sensor: {sensor_id}")
+        else:
+            # Keep the attributes of the existing sensor
+            attributes = states[sensor_id].get("attributes", {})
+        
+        self._sensor_attrs[sensor_id] = attributes
+    
     
+    def _log_exception(self, message: str, e: Exception):
+        """Log an error with the traceback of the exception being handled"""
+        self.log(f"{message}: {e}", level="ERROR")
+        self.log(f"Traceback: {traceback.format_exc()}", level="ERROR")
+    
+    def _load_snapshot(self) -> Dict[str, Any]:
+        """Load the savings saved by _save_snapshot (empty if disabled or unreadable)"""
+        if not self.snapshot_path:
+            return {}
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            snapshot["values"] = {sensor_id: float(value) for sensor_id, value in snapshot.get("values", {}).items()}
+            self.log(f"Loaded savings snapshot from {self.snapshot_path}")
+            return snapshot
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            self.log(f"Could not read savings snapshot {self.snapshot_path}: {e}", level="WARNING")
+            return {}
+    
+    def _save_snapshot(self, kwargs=None):
+        """Write the savings to the snapshot file if they changed since the last write"""
+        snapshot = {
+            "values": self._sensor_values,
+            "last_reset_date": datetime.date.fromordinal(self._last_reset_ordinal).isoformat()
+        }
+        if snapshot == self._saved_snapshot:
+            return
+        
+        # Write to a temporary file and rename it, so a crash never leaves a partial snapshot
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+            self._saved_snapshot = {"values": dict(self._sensor_values), "last_reset_date": snapshot["last_reset_date"]}
+        except (OSError, TypeError, ValueError) as e:
+            self.log(f"Could not write savings snapshot {self.snapshot_path}: {e}", level="WARNING")
+    
+    def terminate(self):
+        """Called when the app is being shut down - save the savings snapshot"""
+        if getattr(self, "snapshot_path", None) and hasattr(self, "_saved_snapshot"):
+            self._save_snapshot()
+    
+    def _on_energy_change(self, entity, attribute, old, new, kwargs):
+        """Schedule a savings update when an energy sensor changes
+        
+        Changes within event_delay seconds of the first one are handled by a single update.
+        """
+        if old == new or self._event_update_handle is not None:
+            return
+        self._event_update_handle = self.run_in(self._on_event_update, self.event_delay)
+    
+    def _on_event_update(self, kwargs):
+        """Run the savings update scheduled by an energy sensor change"""
+        self._event_update_handle = None
+        self._update_savings(kwargs)
     
     def _update_savings(self, kwargs):
-        """Main update method - called every 5 minutes"""
+        """Main update method - called after energy sensor changes and every reset_interval"""
         try:
             self._do_update_savings()
         except Exception as e:
-            self.log(f"Error in savings update: {e}", level="ERROR")
-            import traceback
-            self.log(f"Traceback: {traceback.format_exc()}", level="ERROR")
+            self._log_exception("Error in savings update", e)
     
     def _do_update_savings(self):
         """Main update logic"""
         self.log("Starting savings update...")
         
+        # Current time, read once for the whole update
+        now = self.datetime()
+        
         # Check for time-based resets first
-        self._check_and_handle_time_resets()
+        self._check_and_handle_time_resets(now)
+        
+        # Read the inputs and Tibber price once for the whole update
+        states = self._read_states(self.UPDATE_INPUT_SENSORS)
         
         # Get current energy values
-        current_values = self._get_current_energy_values()
+        current_values = self._get_current_energy_values(states)
         if not current_values:
             self.log("Could not get all current energy values, skipping update", level="WARNING")
             return
         
+        # Nothing to do if the energy values didn't change since the last completed update
+        if current_values == self._last_energy_snapshot:
+            self.log("Energy values unchanged, skipping update")
+            return
+        
         current_pv_kwh, current_grid_kwh, current_discharge_kwh = current_values
         
         # Get last known values
-        last_values = self._get_last_energy_values()
+        last_values = self._last_kwh_values
         last_pv_kwh, last_grid_kwh, last_discharge_kwh = last_values
         
         # Calculate changes (with reset handling)
@@ -192,37 +326,26 @@ class BatterySavingsTracker(hass.Hass):
         self.log(f"Energy deltas - PV: {pv_delta:.3f} kWh, Grid: {grid_delta:.3f} kWh, Discharge: {discharge_delta:.3f} kWh")
         
         # Process energy changes
-        if pv_delta > 0 or grid_delta > 0:
-            self._process_charging(pv_delta, grid_delta)
-        
-        if discharge_delta > 0:
-            self._process_discharging(discharge_delta)
+        self._apply_delta(pv_delta, grid_delta, discharge_delta, states)
         
         # Update state sensors (only if not ignoring resets)
-        self._update_state_sensors_conditionally(current_pv_kwh, current_grid_kwh, current_discharge_kwh,
-                                                should_update_pv, should_update_grid, should_update_discharge)
+        self._update_state_sensors_conditionally(current_values, last_values,
+                                                (should_update_pv, should_update_grid, should_update_discharge), now)
+        self._last_energy_snapshot = current_values
         
         self.log("Savings update completed successfully")
     
-    def _get_current_energy_values(self) -> Optional[tuple]:
-        """Get current energy values from sensors"""
-        current_pv_kwh = self._get_sensor_value(self.BATTERY_PV_ENERGY_SENSOR)
-        current_grid_kwh = self._get_sensor_value(self.BATTERY_GRID_ENERGY_SENSOR)
-        current_discharge_kwh = self._get_sensor_value(self.COMBINED_DISCHARGING_SENSOR)
+    def _get_current_energy_values(self, states: Dict[str, Any]) -> Optional[tuple]:
+        """Get current energy values from the states snapshot"""
+        current_pv_kwh = self._get_sensor_value(self.BATTERY_PV_ENERGY_SENSOR, states)
+        current_grid_kwh = self._get_sensor_value(self.BATTERY_GRID_ENERGY_SENSOR, states)
+        current_discharge_kwh = self._get_sensor_value(self.COMBINED_DISCHARGING_SENSOR, states)
         
         if None in [current_pv_kwh, current_grid_kwh, current_discharge_kwh]:
             return None
         
         return (current_pv_kwh, current_grid_kwh, current_discharge_kwh)
     
-    def _get_last_energy_values(self) -> tuple:
-        """Get last known energy values"""
-        last_pv_kwh = self._get_sensor_value(self.LAST_PV_KWH_SENSOR, default=0)
-        last_grid_kwh = self._get_sensor_value(self.LAST_GRID_KWH_SENSOR, default=0)
-        last_discharge_kwh = self._get_sensor_value(self.LAST_DISCHARGE_KWH_SENSOR, default=0)
-        
-        return (last_pv_kwh, last_grid_kwh, last_discharge_kwh)
-    
     def _calculate_energy_deltas_with_updates(self, current_values: tuple, last_values: tuple) -> tuple:
         """Calculate energy deltas with reset handling and determine which sensors to update"""
         current_pv, current_grid, current_discharge = current_values
@@ -238,10 +361,19 @@ class BatterySavingsTracker(hass.Hass):
         
         return (pv_delta, grid_delta, discharge_delta, should_update_pv, should_update_grid, should_update_discharge)
     
-    def _get_sensor_value(self, sensor_id: str, default=None) -> Optional[float]:
-        """Get sensor value as float"""
+    def _read_states(self, sensor_ids) -> Dict[str, Any]:
+        """Read the full states of the given sensors (sensors HA doesn't have are left out)"""
+        states = {}
+        for sensor_id in sensor_ids:
+            state = self.get_state(sensor_id, attribute="all")
+            if state is not None:
+                states[sensor_id] = state
+        return states
+    
+    def _get_sensor_value(self, sensor_id: str, states: Dict[str, Any], default=None) -> Optional[float]:
+        """Get sensor value from the states snapshot as float"""
         try:
-            state = self.get_state(sensor_id)
+            state = states.get(sensor_id, {}).get("state")
             return float(state) if state is not None else default
         except (ValueError, TypeError):
             self.log(f"Invalid state for {sensor_id}", level="WARNING")
@@ -266,52 +398,66 @@ class BatterySavingsTracker(hass.Hass):
         if current < last:
             self.log(f"Counter reset detected for {sensor_name}: {last} -> {current}", level="WARNING")
             
-            if reset_mode == "ignore_reset":
-                # Ignore the reset completely - return 0 delta and DON'T update last sensor
-                self.log(f"Ignoring reset for {sensor_name}, waiting for recovery", level="INFO")
-                return (0.0, False)
-            elif reset_mode == "continue_from_reset":
-                # Start tracking from the reset value - return current value as delta
-                self.log(f"Continuing from reset value for {sensor_name}: using {current} kWh as delta", level="INFO")
-                return (current, True)
-            elif reset_mode == "daily_counter":
-                # Treat reset value as the actual energy delta (for daily counters that reset at midnight)
-                self.log(f"Preserving delta for {sensor_name}: estimated {current} kWh since reset", level="INFO")
-                return (current, True)
-            else:
+            handler = self._reset_handlers.get(reset_mode)
+            if handler is None:
                 self.log(f"Unknown reset mode '{reset_mode}' for {sensor_name}, defaulting to ignore_reset", level="WARNING")
                 return (0.0, False)
+            return handler(current, sensor_name)
         
         return (current - last, True)
     
-    def _process_charging(self, pv_delta: float, grid_delta: float):
-        """Process battery charging and calculate costs"""
-        if pv_delta <= 0 and grid_delta <= 0:
+    def _ignore_counter_reset(self, current: float, sensor_name: str) -> tuple:
+        """Ignore the reset completely - return 0 delta and DON'T update last sensor"""
+        self.log(f"Ignoring reset for {sensor_name}, waiting for recovery", level="INFO")
+        return (0.0, False)
+    
+    def _continue_from_counter_reset(self, current: float, sensor_name: str) -> tuple:
+        """Start tracking from the reset value - return current value as delta"""
+        self.log(f"Continuing from reset value for {sensor_name}: using {current} kWh as delta", level="INFO")
+        return (current, True)
+    
+    def _preserve_counter_reset_delta(self, current: float, sensor_name: str) -> tuple:
+        """Treat reset value as the actual energy delta (for daily counters that reset at midnight)"""
+        self.log(f"Preserving delta for {sensor_name}: estimated {current} kWh since reset", level="INFO")
+        return (current, True)
+    
+    def _apply_delta(self, pv_delta: float, grid_delta: float, discharge_delta: float, states: Dict[str, Any]):
+        """Calculate charging costs and discharge savings and add them to the savings sensors"""
+        charging = pv_delta > 0 or grid_delta > 0
+        discharging = discharge_delta > 0
+        if not charging and not discharging:
             return
-            
-        # Get current Tibber price
-        tibber_price_ct = self._get_tibber_price_ct()
+        
+        # Get current Tibber price (once for charging and discharging)
+        tibber_price_ct = self._get_tibber_price_ct(states)
         if tibber_price_ct is None:
-            self.log("Could not get Tibber price, skipping charging cost calculation", level="WARNING")
+            if charging:
+                self.log("Could not get Tibber price, skipping charging cost calculation", level="WARNING")
+            if discharging:
+                self.log("Could not get Tibber price, skipping discharge savings calculation", level="WARNING")
             return
         
-        # Calculate costs (negative values = costs)
-        costs = self._calculate_charging_costs(pv_delta, grid_delta, tibber_price_ct)
-        pv_cost_eur, grid_cost_eur = costs
+        # Calculate costs (negative values = costs) and savings (positive value)
+        pv_cost_eur, grid_cost_eur = self._calculate_charging_costs(pv_delta, grid_delta, tibber_price_ct)
+        discharge_savings_eur = 0
+        if discharging:
+            discharge_savings_eur = (discharge_delta * tibber_price_ct) / self.CT_TO_EUR_FACTOR
+            self.log(f"Discharge savings: {discharge_delta:.3f} kWh * {tibber_price_ct}ct = {discharge_savings_eur:.6f}€")
         
         # Update cumulative sensors
-        if pv_cost_eur != 0:
-            self._add_to_cumulative_sensor(self.PV_CHARGING_COST_SENSOR, pv_cost_eur)
-        if grid_cost_eur != 0:
-            self._add_to_cumulative_sensor(self.GRID_CHARGING_COST_SENSOR, grid_cost_eur)
+        for sensor_id, amount in ((self.PV_CHARGING_COST_SENSOR, pv_cost_eur),
+                                  (self.GRID_CHARGING_COST_SENSOR, grid_cost_eur),
+                                  (self.DISCHARGE_SAVINGS_SENSOR, discharge_savings_eur)):
+            if amount != 0:
+                self._add_to_cumulative_sensor(sensor_id, amount)
         
         # Update total savings
         self._update_total_savings()
         
         # Update time-based savings
-        total_cost = pv_cost_eur + grid_cost_eur
-        if total_cost != 0:
-            self._update_time_based_savings(total_cost)
+        net_savings = pv_cost_eur + grid_cost_eur + discharge_savings_eur
+        if net_savings != 0:
+            self._update_time_based_savings(net_savings)
     
     def _calculate_charging_costs(self, pv_delta: float, grid_delta: float, tibber_price_ct: float) -> tuple:
         """Calculate PV and grid charging costs"""
@@ -329,38 +475,19 @@ class BatterySavingsTracker(hass.Hass):
         
         return (pv_cost_eur, grid_cost_eur)
     
-    def _process_discharging(self, discharge_delta: float):
-        """Process battery discharging and calculate savings"""
-        if discharge_delta <= 0:
-            return
-            
-        # Get current Tibber price
-        tibber_price_ct = self._get_tibber_price_ct()
-        if tibber_price_ct is None:
-            self.log("Could not get Tibber price, skipping discharge savings calculation", level="WARNING")
-            return
-        
-        # Calculate savings (positive value)
-        discharge_savings_eur = (discharge_delta * tibber_price_ct) / self.CT_TO_EUR_FACTOR
-        self.log(f"Discharge savings: {discharge_delta:.3f} kWh * {tibber_price_ct}ct = {discharge_savings_eur:.6f}€")
-        
-        # Update cumulative sensors
-        self._add_to_cumulative_sensor(self.DISCHARGE_SAVINGS_SENSOR, discharge_savings_eur)
-        
-        # Update total savings
-        self._update_total_savings()
-        
-        # Update time-based savings
-        self._update_time_based_savings(discharge_savings_eur)
-    
-    def _get_tibber_price_ct(self) -> Optional[float]:
-        """Get current Tibber price in ct/kWh"""
+    def _get_tibber_price_ct(self, states: Dict[str, Any]) -> Optional[float]:
+        """Get current Tibber price in ct/kWh from the states snapshot"""
         try:
             # Get price from configurable Tibber sensor (in EUR/kWh)
-            price_eur = self.get_state(self.TIBBER_PRICE_SENSOR, attribute="current_price")
-            if price_eur is not None:
-                return float(price_eur) * self.CT_TO_EUR_FACTOR  # Convert EUR/kWh to ct/kWh
-            return None
+            price_eur = states.get(self.TIBBER_PRICE_SENSOR, {}).get("attributes", {}).get("current_price")
+            if price_eur is None:
+                return None
+            
+            cached_price_eur, price_ct = self._tibber_cache
+            if price_eur != cached_price_eur:
+                price_ct = float(price_eur) * self.CT_TO_EUR_FACTOR  # Convert EUR/kWh to ct/kWh
+                self._tibber_cache = (price_eur, price_ct)
+            return price_ct
         except (ValueError, TypeError):
             self.log("Error getting Tibber price", level="WARNING")
             return None
@@ -368,118 +495,126 @@ class BatterySavingsTracker(hass.Hass):
     def _add_to_cumulative_sensor(self, sensor_id: str, value: float):
         """Add value to cumulative sensor"""
         try:
-            current_value = self._get_sensor_value(sensor_id, default=0)
+            current_value = self._sensor_values[sensor_id]
             new_value = current_value + value
-            
-            self.set_state(sensor_id,
-                          state=round(new_value, 6),
-                          attributes=self.get_state(sensor_id, attribute="all")["attributes"])
+            self._set_money_sensor(sensor_id, new_value)
             
             self.log(f"Updated {sensor_id}: {current_value:.6f} + {value:.6f} = {new_value:.6f}€")
         except Exception as e:
-            self.log(f"Error updating cumulative sensor {sensor_id}: {e}", level="ERROR")
-            import traceback
-            self.log(f"Traceback: {traceback.format_exc()}", level="ERROR")
+            self._log_exception(f"Error updating cumulative sensor {sensor_id}", e)
+    
+    def _set_money_sensor(self, sensor_id: str, value: float):
+        """Write an EUR sensor and remember its unrounded value (formatted only for the sensor state)"""
+        self.set_state(sensor_id,
+                      state=self._format_eur(value),
+                      attributes=self._sensor_attrs[sensor_id])
+        self._sensor_values[sensor_id] = value
+    
+    @staticmethod
+    def _format_eur(value: float) -> str:
+        """Format an EUR value as sensor state with fixed 6 decimal places"""
+        return f"{value:.6f}"
     
     def _update_total_savings(self):
         """Update total savings sensor"""
         try:
             # Get all cost/savings components
             savings_components = {
-                "PV cost": self._get_sensor_value(self.PV_CHARGING_COST_SENSOR, default=0),
-                "Grid cost": self._get_sensor_value(self.GRID_CHARGING_COST_SENSOR, default=0),
-                "Discharge savings": self._get_sensor_value(self.DISCHARGE_SAVINGS_SENSOR, default=0)
+                "PV cost": self._sensor_values[self.PV_CHARGING_COST_SENSOR],
+                "Grid cost": self._sensor_values[self.GRID_CHARGING_COST_SENSOR],
+                "Discharge savings": self._sensor_values[self.DISCHARGE_SAVINGS_SENSOR]
             }
             
             # Total savings = discharge savings + charging costs (costs are negative)
             total_savings = sum(savings_components.values())
             
-            self.set_state(self.TOTAL_SAVINGS_SENSOR,
-                          state=round(total_savings, 6),
-                          attributes=self.get_state(self.TOTAL_SAVINGS_SENSOR, attribute="all")["attributes"])
+            self._set_money_sensor(self.TOTAL_SAVINGS_SENSOR, total_savings)
             
             # Create readable log message
             components_str = " + ".join([f"{v:.6f}" for v in savings_components.values()])
             self.log(f"Total savings updated: {components_str} = {total_savings:.6f}€")
         except Exception as e:
-            self.log(f"Error updating total savings: {e}", level="ERROR")
-            import traceback
-            self.log(f"Traceback: {traceback.format_exc()}", level="ERROR")
+            self._log_exception("Error updating total savings", e)
     
-    def _update_state_sensors_conditionally(self, pv_kwh: float, grid_kwh: float, discharge_kwh: float,
-                                           should_update_pv: bool, should_update_grid: bool, should_update_discharge: bool):
-        """Update state management sensors conditionally based on reset handling"""
+    def _update_state_sensors_conditionally(self, current_values: tuple, last_values: tuple, update_flags: tuple,
+                                           now: datetime.datetime):
+        """Update state management sensors conditionally based on reset handling
+        
+        Args:
+            current_values: Current (PV, grid, discharge) kWh
+            last_values: Last stored (PV, grid, discharge) kWh
+            update_flags: Whether each last value may be updated (False while ignoring a reset)
+            now: Time of the update, stored as the last run timestamp
+        """
         try:
-            timestamp = self.datetime().isoformat()
-            
             # Always update timestamp
-            self.set_state(self.LAST_RUN_SENSOR, state=timestamp)
-            
-            # Conditionally update energy sensors (don't update if we're ignoring a reset)
-            if should_update_pv:
-                self.set_state(self.LAST_PV_KWH_SENSOR, state=str(round(pv_kwh, 6)))
+            updates = [(self.LAST_RUN_SENSOR, now.isoformat())]
             
-            if should_update_grid:
-                self.set_state(self.LAST_GRID_KWH_SENSOR, state=str(round(grid_kwh, 6)))
+            # Only write the energy sensors that may be updated and whose value changed
+            new_last_values = list(last_values)
+            for i, (sensor_id, kwh, last_kwh, should_update) in enumerate(
+                    zip(self.LAST_KWH_SENSORS, current_values, last_values, update_flags)):
+                if should_update and kwh != last_kwh:
+                    rounded_kwh = round(kwh, 6)
+                    updates.append((sensor_id, str(rounded_kwh)))
+                    new_last_values[i] = rounded_kwh
+            self._last_kwh_values = tuple(new_last_values)
             
-            if should_update_discharge:
-                self.set_state(self.LAST_DISCHARGE_KWH_SENSOR, state=str(round(discharge_kwh, 6)))
+            for sensor_id, state in updates:
+                self.set_state(sensor_id, state=state)
                 
         except Exception as e:
-            self.log(f"Error updating state sensors: {e}", level="ERROR")
-            import traceback
-            self.log(f"Traceback: {traceback.format_exc()}", level="ERROR")
+            self._log_exception("Error updating state sensors", e)
     
-    def _initialize_time_based_tracking(self):
-        """Initialize time-based tracking with current date"""
+    def _initialize_time_based_tracking(self, states: Dict[str, Any], saved_reset_date: Optional[str] = None):
+        """Initialize time-based tracking with current date (or the reset date restored from the snapshot)"""
         now = self.datetime()
-        current_date = now.strftime("%Y-%m-%d")
+        current_date = now.date().isoformat()
         
-        # Initialize reset date if it doesn't exist
-        current_state = self.get_state(self.LAST_RESET_DATE_SENSOR)
+        # Initialize reset date if it doesn't exist (the date is kept in memory as an ordinal)
+        current_state = states.get(self.LAST_RESET_DATE_SENSOR, {}).get("state", saved_reset_date)
         if current_state is None or current_state == "0":
             self.set_state(self.LAST_RESET_DATE_SENSOR, state=current_date)
             self.log(f"Initialized {self.LAST_RESET_DATE_SENSOR} with {current_date}")
-    
-    def _check_and_handle_time_resets(self):
-        """Check if we need to reset time-based sensors for new periods"""
-        now = self.datetime()
-        current_date = now.strftime("%Y-%m-%d")
-        
-        # Get last reset date
-        last_reset_date_str = self.get_state(self.LAST_RESET_DATE_SENSOR)
-        if not last_reset_date_str or last_reset_date_str == "0":
-            # First run, initialize and return
-            self.set_state(self.LAST_RESET_DATE_SENSOR, state=current_date)
+            self._last_reset_ordinal = now.date().toordinal()
             return
         
         try:
-            last_reset_date = datetime.datetime.strptime(last_reset_date_str, "%Y-%m-%d")
-            current_datetime = datetime.datetime.strptime(current_date, "%Y-%m-%d")
+            self._last_reset_ordinal = datetime.date.fromisoformat(current_state).toordinal()
         except ValueError:
-            self.log(f"Invalid date format in reset sensor: {last_reset_date_str}", level="WARNING")
+            self.log(f"Invalid date format in reset sensor: {current_state}", level="WARNING")
             self.set_state(self.LAST_RESET_DATE_SENSOR, state=current_date)
+            self._last_reset_ordinal = now.date().toordinal()
+    
+    def _check_and_handle_time_resets(self, now: datetime.datetime):
+        """Check if we need to reset time-based sensors for new periods"""
+        current_ordinal = now.date().toordinal()
+        
+        # Still the day of the last reset (or the clock went back) - nothing to reset
+        if current_ordinal <= self._last_reset_ordinal:
             return
         
-        # Check if we need to reset any periods
-        if current_datetime > last_reset_date:
-            self._process_period_resets(last_reset_date, current_datetime)
-            # Update the reset date
-            self.set_state(self.LAST_RESET_DATE_SENSOR, state=current_date)
+        current_date = now.date()
+        self._process_period_resets(datetime.date.fromordinal(self._last_reset_ordinal), current_date)
+        
+        # Update the reset date
+        self._last_reset_ordinal = current_ordinal
+        self.set_state(self.LAST_RESET_DATE_SENSOR, state=current_date.isoformat())
     
-    def _process_period_resets(self, last_date: datetime.datetime, current_date: datetime.datetime):
+    def _process_period_resets(self, last_date: datetime.date, current_date: datetime.date):
         """Process all applicable period resets based on date change"""
+        last_ordinal = last_date.toordinal()
+        current_ordinal = current_date.toordinal()
         
         # Always reset daily if date changed
         self._reset_time_based_sensor(self.DAILY_SAVINGS_SENSOR, "daily")
-        self.log(f"Daily savings reset for new day: {current_date.strftime('%Y-%m-%d')}")
+        self.log(f"Daily savings reset for new day: {current_date.isoformat()}")
         
-        # Check weekly reset (Monday = start of week)
-        last_week_start = self._get_week_start_date(last_date)
-        current_week_start = self._get_week_start_date(current_date)
-        if current_week_start > last_week_start:
+        # Check weekly reset (Monday = start of week; ordinal 1 is a Monday)
+        if (current_ordinal - 1) // 7 != (last_ordinal - 1) // 7:
+            current_week_start = datetime.date.fromordinal(current_ordinal - (current_ordinal - 1) % 7)
             self._reset_time_based_sensor(self.WEEKLY_SAVINGS_SENSOR, "weekly")
-            self.log(f"Weekly savings reset for new week starting: {current_week_start.strftime('%Y-%m-%d')}")
+            self.log(f"Weekly savings reset for new week starting: {current_week_start.isoformat()}")
         
         # Check monthly reset
         if current_date.month != last_date.month or current_date.year != last_date.year:
@@ -491,43 +626,25 @@ class BatterySavingsTracker(hass.Hass):
             self._reset_time_based_sensor(self.YEARLY_SAVINGS_SENSOR, "yearly")
             self.log(f"Yearly savings reset for new year: {current_date.year}")
     
-    def _get_week_start_date(self, date: datetime.datetime) -> datetime.datetime:
-        """Get the start date of the week (Monday) for the given date"""
-        days_since_monday = date.weekday()
-        week_start = date - datetime.timedelta(days=days_since_monday)
-        return week_start
-    
     def _reset_time_based_sensor(self, sensor_id: str, period_name: str):
         """Reset a time-based sensor to 0"""
         self.set_state(sensor_id,
                       state="0",
-                      attributes=self.get_state(sensor_id, attribute="all")["attributes"])
+                      attributes=self._sensor_attrs[sensor_id])
+        self._sensor_values[sensor_id] = 0.0
         self.log(f"Reset {period_name} savings sensor {sensor_id} to 0")
     
     def _update_time_based_savings(self, savings_amount: float):
         """Update daily, weekly, monthly, and yearly savings sensors"""
-        time_sensors = [
-            (self.DAILY_SAVINGS_SENSOR, "daily"),
-            (self.WEEKLY_SAVINGS_SENSOR, "weekly"),
-            (self.MONTHLY_SAVINGS_SENSOR, "monthly"),
-            (self.YEARLY_SAVINGS_SENSOR, "yearly")
-        ]
-        
-        for sensor_id, period_name in time_sensors:
-            self._add_to_time_based_sensor(sensor_id, savings_amount, period_name)
-    
-    def _add_to_time_based_sensor(self, sensor_id: str, value: float, period_name: str):
-        """Add value to time-based sensor"""
         try:
-            current_value = self._get_sensor_value(sensor_id, default=0)
-            new_value = current_value + value
+            # Compute all new values first, then write them back-to-back
+            new_values = [(sensor_id, period_name, self._sensor_values[sensor_id] + savings_amount)
+                          for sensor_id, period_name in self.TIME_BASED_SENSORS]
             
-            self.set_state(sensor_id,
-                          state=round(new_value, 6),
-                          attributes=self.get_state(sensor_id, attribute="all")["attributes"])
+            for sensor_id, _, new_value in new_values:
+                self._set_money_sensor(sensor_id, new_value)
             
-            self.log(f"Updated {period_name} savings: {current_value:.6f} + {value:.6f} = {new_value:.6f}€")
+            self.log(f"Updated time-based savings by {savings_amount:.6f}€: " +
+                     ", ".join(f"{period_name} {new_value:.6f}€" for _, period_name, new_value in new_values))
         except Exception as e:
-            self.log(f"Error updating {period_name} savings sensor {sensor_id}: {e}", level="ERROR")
-            import traceback
-            self.log(f"Traceback: {traceback.format_exc()}", level="ERROR")
\ No newline at end of file
+            self._log_exception("Error updating time-based savings sensors", e)
\ No newline at end of file
@@ -5,16 +5,120 @@ Specialized integration test utilities for the Battery Savings Tracker applicati
 Provides battery tracker specific test data, scenarios, and assertions.
 """
 
-import sys
-import os
-from typing import Dict, Any
-
-# Add the apps directory to Python path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Any, Iterable, Mapping, Optional, Tuple
 
 from ...tests.integration_test_base import IntegrationTestBase
 
 
+# Cents per EUR, as the tracker converts its ct costs (CT_TO_EUR_FACTOR)
+_CT_PER_EUR = 100
+
+# Default battery tracker configuration, shared by all helpers that only read it
+_DEFAULT_CONFIG = MappingProxyType({
+    'reset_interval': 3600,
+    'pv_surplus_rate_ct': 7.8,
+    # Configurable sensor names (using defaults)
+    'battery_pv_energy_sensor': 'sensor.battery_combined_pv_energy',
+    'battery_grid_energy_sensor': 'sensor.battery_combined_grid_energy',
+    'battery_discharge_sensor': 'sensor.combined_battery_total_discharging_kwh',
+    'tibber_price_sensor': 'sensor.tibber_future_statistics'
+})
+
+# Sensor names from the default configuration: key -> entity id
+_SENSOR_NAMES = MappingProxyType({
+    'pv_energy': _DEFAULT_CONFIG['battery_pv_energy_sensor'],
+    'grid_energy': _DEFAULT_CONFIG['battery_grid_energy_sensor'],
+    'discharge': _DEFAULT_CONFIG['battery_discharge_sensor'],
+    'tibber_price': _DEFAULT_CONFIG['tibber_price_sensor']
+})
+
+# Attributes shared by the energy distributor sensors (copied per state by _copy_states)
+_ENERGY_ATTRS = MappingProxyType({
+    "unit_of_measurement": "kWh",
+    "device_class": "energy",
+    "state_class": "total_increasing"
+})
+
+# Realistic initial states of the source sensors, built once at import (see setup_realistic_initial_states)
+_INITIAL_STATES_TEMPLATE = MappingProxyType({
+    # Energy distributor sensors (source sensors)
+    _SENSOR_NAMES['pv_energy']: {
+        "state": "10.5",
+        "attributes": _ENERGY_ATTRS
+    },
+    _SENSOR_NAMES['grid_energy']: {
+        "state": "5.2",
+        "attributes": _ENERGY_ATTRS
+    },
+    _SENSOR_NAMES['discharge']: {
+        "state": "8.7",
+        "attributes": _ENERGY_ATTRS
+    },
+    # Tibber pricing sensor
+    _SENSOR_NAMES['tibber_price']: {
+        "state": "available",
+        "attributes": {
+            "current_price": 0.25,  # EUR/kWh
+            "unit_of_measurement": "EUR/kWh"
+        }
+    }
+})
+
+# Sensors the tracker creates on initialization
+_EXPECTED_TRACKING_SENSORS = frozenset({
+    # State management sensors
+    "sensor.battery_savings_last_run_timestamp",
+    "sensor.battery_savings_last_pv_kwh",
+    "sensor.battery_savings_last_grid_kwh",
+    "sensor.battery_savings_last_discharge_kwh",
+    
+    # Cumulative tracking sensors
+    "sensor.battery_total_money_saved_eur",
+    "sensor.battery_pv_charging_cost_eur",
+    "sensor.battery_grid_charging_cost_eur",
+    "sensor.battery_discharge_savings_eur",
+    
+    # Time-based savings tracking sensors
+    "sensor.battery_daily_money_saved_eur",
+    "sensor.battery_weekly_money_saved_eur",
+    "sensor.battery_monthly_money_saved_eur",
+    "sensor.battery_yearly_money_saved_eur",
+    
+    # Reset tracking sensor
+    "sensor.battery_savings_last_reset_date"
+})
+
+# Energy counters after a reset, all below their realistic initial states
+_COUNTER_RESET_STATES = MappingProxyType({
+    _SENSOR_NAMES['pv_energy']: "0.5",     # Reset from 10.5
+    _SENSOR_NAMES['grid_energy']: "0.2",   # Reset from 5.2
+    _SENSOR_NAMES['discharge']: "1.1"      # Reset from 8.7
+})
+
+# Realistic daily energy flow: (Tibber price in EUR/kWh, action, kWh increase) per step
+_DAILY_SCRIPT = (
+    (0.20, 'pv', 1.0),         # Morning PV charging (20 ct/kWh)
+    (0.15, 'pv', 3.0),         # Midday high PV charging (low midday rates)
+    (0.25, 'grid', 2.0),       # Evening grid charging (still reasonable rates)
+    (0.35, 'discharge', 4.0)   # Night discharge (peak rates)
+)
+
+# Energy sensor (key of _SENSOR_NAMES) increased by each daily script action
+_DAILY_ACTIONS = {
+    'pv': 'pv_energy',
+    'grid': 'grid_energy',
+    'discharge': 'discharge'
+}
+
+
+def _copy_states(states: Mapping[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Copy a states template so the mock can't modify the shared state and attribute dicts"""
+    return {entity_id: {"state": state["state"], "attributes": dict(state["attributes"])}
+            for entity_id, state in states.items()}
+
+
 class BatteryTrackerIntegrationTest(IntegrationTestBase):
     """
     Specialized integration test base for Battery Savings Tracker
@@ -22,68 +126,110 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
     Provides battery tracker specific utilities and realistic test data.
     """
     
+    # Sensors the tracker creates for its state and results
+    EXPECTED_TRACKING_SENSORS = _EXPECTED_TRACKING_SENSORS
+    
+    def __init__(self):
+        super().__init__()
+        # Energy sensor values last set by the simulate_* helpers: entity id -> kWh
+        self._last_values: Dict[str, float] = {}
+        # Config the current app was set up with (see setup_app)
+        self._app_config: Optional[Dict[str, Any]] = None
+    
+    def setup_app(self, app_class, config: Dict[str, Any]) -> None:
+        """Set up the app, remembering its config for restart_app"""
+        self._app_config = config
+        super().setup_app(app_class, config)
+    
+    def restart_app(self, app_class, states: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Simulate an app restart with a new app instance, initialized with the same config
+        
+        The old app is torn down with its listeners and scheduled callbacks. The
+        tracking sensors keep their states, as Home Assistant keeps them across
+        an AppDaemon restart, and the source sensors are set to the given states.
+        
+        Args:
+            app_class: App class to set up again
+            states: Initial states of the source sensors (see get_energy_states)
+        """
+        kept_states = {sensor_id: self.get_sensor_value(sensor_id) for sensor_id in self.EXPECTED_TRACKING_SENSORS}
+        self.teardown_app()
+        self.setup_app(app_class, self._app_config)
+        self.set_initial_states(states)
+        for sensor_id, state in kept_states.items():
+            if state is not None:
+                self.mock.set_state(sensor_id, state)
+        self.initialize_app()
+    
+    def set_initial_states(self, states: Dict[str, Dict[str, Any]]) -> None:
+        """Set initial states, dropping the cached energy sensor values"""
+        self._last_values.clear()
+        super().set_initial_states(states)
+    
+    def simulate_sensor_update(self, entity_id: str, state: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        """Simulate a sensor update, dropping the cached value of the sensor"""
+        self._last_values.pop(entity_id, None)
+        super().simulate_sensor_update(entity_id, state, attributes)
+    
+    def get_sensor_value_float(self, sensor_id: str) -> float:
+        """Get a sensor state as float
+        
+        Energy sensors last set by the simulate_* helpers are answered from
+        their cached values. Other sensors, e.g. the cost sensors the app
+        writes, are read from the mock, as the app may have changed them.
+        """
+        value = self._last_values.get(sensor_id)
+        if value is None:
+            value = float(self.get_sensor_value(sensor_id))
+        return value
+    
     def get_default_config(self) -> Dict[str, Any]:
-        """Get default configuration for battery tracker tests"""
-        return {
-            'update_interval': 300,
-            'pv_surplus_rate_ct': 7.8,
-            # Configurable sensor names (using defaults)
-            'battery_pv_energy_sensor': 'sensor.battery_combined_pv_energy',
-            'battery_grid_energy_sensor': 'sensor.battery_combined_grid_energy',
-            'battery_discharge_sensor': 'sensor.combined_battery_total_discharging_kwh',
-            'tibber_price_sensor': 'sensor.tibber_future_statistics'
-        }
+        """Get default configuration for battery tracker tests (a fresh copy the app may modify)"""
+        return dict(_DEFAULT_CONFIG)
     
-    def get_sensor_names(self) -> Dict[str, str]:
-        """Get the sensor names from the current configuration"""
-        config = self.get_default_config()
-        return {
-            'pv_energy': config['battery_pv_energy_sensor'],
-            'grid_energy': config['battery_grid_energy_sensor'],
-            'discharge': config['battery_discharge_sensor'],
-            'tibber_price': config['tibber_price_sensor']
-        }
+    @staticmethod
+    def get_sensor_names() -> Mapping[str, str]:
+        """Get the sensor names from the default configuration (built once at import, read-only)"""
+        return _SENSOR_NAMES
     
     def setup_realistic_initial_states(self) -> None:
         """Set up realistic initial sensor states for battery tracker testing"""
-        sensors = self.get_sensor_names()
-        initial_states = {
-            # Energy distributor sensors (source sensors)
-            sensors['pv_energy']: {
-                "state": "10.5",
-                "attributes": {
-                    "unit_of_measurement": "kWh",
-                    "device_class": "energy",
-                    "state_class": "total_increasing"
-                }
-            },
-            sensors['grid_energy']: {
-                "state": "5.2",
-                "attributes": {
-                    "unit_of_measurement": "kWh",
-                    "device_class": "energy",
-                    "state_class": "total_increasing"
-                }
-            },
-            sensors['discharge']: {
-                "state": "8.7",
-                "attributes": {
-                    "unit_of_measurement": "kWh",
-                    "device_class": "energy",
-                    "state_class": "total_increasing"
-                }
-            },
-            # Tibber pricing sensor
-            sensors['tibber_price']: {
-                "state": "available",
-                "attributes": {
-                    "current_price": 0.25,  # EUR/kWh
-                    "unit_of_measurement": "EUR/kWh"
-                }
+        self.set_initial_states(_copy_states(_INITIAL_STATES_TEMPLATE))
+    
+    @staticmethod
+    def get_energy_states(price_eur_per_kwh: Optional[float], pv: str = "0.0", grid: str = "0.0",
+                          discharge: str = "0.0") -> Dict[str, Dict[str, Any]]:
+        """
+        Build the states of the energy sensors and the Tibber price
+        
+        Args:
+            price_eur_per_kwh: Tibber price in EUR per kWh, None for an unavailable Tibber sensor
+            pv: PV energy sensor state in kWh
+            grid: Grid energy sensor state in kWh
+            discharge: Discharge energy sensor state in kWh
+        """
+        return {
+            _SENSOR_NAMES['pv_energy']: {"state": pv},
+            _SENSOR_NAMES['grid_energy']: {"state": grid},
+            _SENSOR_NAMES['discharge']: {"state": discharge},
+            _SENSOR_NAMES['tibber_price']: {
+                "state": "available" if price_eur_per_kwh is not None else "unavailable",
+                "attributes": {"current_price": price_eur_per_kwh}
             }
         }
-        
-        self.set_initial_states(initial_states)
+    
+    def set_energy_states(self, price_eur_per_kwh: Optional[float], pv: str = "0.0", grid: str = "0.0",
+                          discharge: str = "0.0") -> None:
+        """Set the initial states of the energy sensors and the Tibber price (see get_energy_states)"""
+        self.set_initial_states(self.get_energy_states(price_eur_per_kwh, pv, grid, discharge))
+    
+    def _bump_sensor(self, sensor_key: str, kwh_increase: float) -> None:
+        """Increase an energy sensor (key of get_sensor_names) by kwh_increase"""
+        sensor_id = _SENSOR_NAMES[sensor_key]
+        new_value = self.get_sensor_value_float(sensor_id) + kwh_increase
+        self.simulate_sensor_update(sensor_id, str(new_value))
+        self._last_values[sensor_id] = new_value
     
     def simulate_pv_charging_scenario(self, pv_kwh_increase: float = 2.0) -> None:
         """
@@ -92,10 +238,7 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
         Args:
             pv_kwh_increase: Amount of PV energy increase in kWh
         """
-        sensors = self.get_sensor_names()
-        current_pv = float(self.get_sensor_value(sensors['pv_energy']))
-        new_pv = current_pv + pv_kwh_increase
-        self.simulate_sensor_update(sensors['pv_energy'], str(new_pv))
+        self._bump_sensor('pv_energy', pv_kwh_increase)
     
     def simulate_grid_charging_scenario(self, grid_kwh_increase: float = 1.5) -> None:
         """
@@ -104,10 +247,7 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
         Args:
             grid_kwh_increase: Amount of grid energy increase in kWh
         """
-        sensors = self.get_sensor_names()
-        current_grid = float(self.get_sensor_value(sensors['grid_energy']))
-        new_grid = current_grid + grid_kwh_increase
-        self.simulate_sensor_update(sensors['grid_energy'], str(new_grid))
+        self._bump_sensor('grid_energy', grid_kwh_increase)
     
     def simulate_discharge_scenario(self, discharge_kwh_increase: float = 3.0) -> None:
         """
@@ -116,10 +256,17 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
         Args:
             discharge_kwh_increase: Amount of discharge energy increase in kWh
         """
-        sensors = self.get_sensor_names()
-        current_discharge = float(self.get_sensor_value(sensors['discharge']))
-        new_discharge = current_discharge + discharge_kwh_increase
-        self.simulate_sensor_update(sensors['discharge'], str(new_discharge))
+        self._bump_sensor('discharge', discharge_kwh_increase)
+    
+    def simulate_sensor_updates(self, updates: Mapping[str, str]) -> None:
+        """
+        Simulate several sensor updates, in order, before the next update cycle
+        
+        Args:
+            updates: New state per sensor
+        """
+        for entity_id, state in updates.items():
+            self.simulate_sensor_update(entity_id, state)
     
     def set_tibber_price(self, price_eur_per_kwh: float) -> None:
         """
@@ -128,21 +275,12 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
         Args:
             price_eur_per_kwh: Price in EUR per kWh
         """
-        sensors = self.get_sensor_names()
-        self.simulate_sensor_update(
-            sensors['tibber_price'],
-            "available",
-            {"current_price": price_eur_per_kwh}
-        )
+        # A new attributes dict per update, so the mock never shares it between states
+        self.simulate_sensor_update(_SENSOR_NAMES['tibber_price'], "available", {"current_price": price_eur_per_kwh})
     
     def set_tibber_unavailable(self) -> None:
         """Set Tibber sensor to unavailable state"""
-        sensors = self.get_sensor_names()
-        self.simulate_sensor_update(
-            sensors['tibber_price'],
-            "unavailable",
-            {"current_price": None}
-        )
+        self.simulate_sensor_update(_SENSOR_NAMES['tibber_price'], "unavailable", {"current_price": None})
     
     def assert_cost_calculation_correct(self, sensor_id: str, expected_cost: float, tolerance: float = 0.000001) -> None:
         """
@@ -153,77 +291,70 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
             expected_cost: Expected cost value
             tolerance: Tolerance for floating point comparison
         """
-        actual_cost = float(self.get_sensor_value(sensor_id))
+        actual_cost = self.get_sensor_value_float(sensor_id)
         assert abs(actual_cost - expected_cost) < tolerance, \
             f"Cost calculation for {sensor_id}: expected {expected_cost:.6f}€, got {actual_cost:.6f}€"
     
-    def assert_all_tracking_sensors_created(self) -> None:
-        """Assert that all expected tracking sensors were created"""
-        expected_sensors = [
-            # State management sensors
-            "sensor.battery_savings_last_run_timestamp",
-            "sensor.battery_savings_last_pv_kwh",
-            "sensor.battery_savings_last_grid_kwh", 
-            "sensor.battery_savings_last_discharge_kwh",
-            
-            # Cumulative tracking sensors
-            "sensor.battery_total_money_saved_eur",
-            "sensor.battery_pv_charging_cost_eur",
-            "sensor.battery_grid_charging_cost_eur",
-            "sensor.battery_discharge_savings_eur",
-            
-            # Time-based savings tracking sensors
-            "sensor.battery_daily_money_saved_eur",
-            "sensor.battery_weekly_money_saved_eur",
-            "sensor.battery_monthly_money_saved_eur",
-            "sensor.battery_yearly_money_saved_eur",
-            
-            # Reset tracking sensor
-            "sensor.battery_savings_last_reset_date"
-        ]
+    def assert_costs_correct(self, expectations: Mapping[str, float], tolerance: float = 0.000001) -> None:
+        """
+        Assert that several cost calculations are correct within tolerance
+        
+        All mismatches are reported together rather than stopping at the first one.
         
-        for sensor_id in expected_sensors:
+        Args:
+            expectations: Expected cost value per cost sensor
+            tolerance: Tolerance for floating point comparison
+        """
+        mismatches = []
+        for sensor_id, expected_cost in expectations.items():
+            actual_cost = self.get_sensor_value_float(sensor_id)
+            if abs(actual_cost - expected_cost) >= tolerance:
+                mismatches.append(f"{sensor_id}: expected {expected_cost:.6f}€, got {actual_cost:.6f}€")
+        assert not mismatches, "Cost calculations differ - " + "; ".join(mismatches)
+    
+    def assert_sensors_exist(self, sensor_ids: Iterable[str]) -> None:
+        """Assert that all given sensors exist (checked in sorted order for stable failures)"""
+        for sensor_id in sorted(sensor_ids):
             self.assert_sensor_exists(sensor_id)
     
+    def assert_all_tracking_sensors_created(self) -> None:
+        """Assert that all expected tracking sensors were created"""
+        self.assert_sensors_exist(self.EXPECTED_TRACKING_SENSORS)
+    
     def simulate_counter_reset_scenario(self) -> None:
         """Simulate a counter reset scenario where current values are less than last values"""
         # Set up scenario where counters have reset (current < last)
-        sensors = self.get_sensor_names()
-        self.simulate_sensor_update(sensors['pv_energy'], "0.5")  # Reset from 10.5
-        self.simulate_sensor_update(sensors['grid_energy'], "0.2")  # Reset from 5.2
-        self.simulate_sensor_update(sensors['discharge'], "1.1")  # Reset from 8.7
+        self.simulate_sensor_updates(_COUNTER_RESET_STATES)
     
-    def simulate_realistic_daily_scenario(self) -> None:
+    def simulate_realistic_daily_scenario(self, script: Iterable[Tuple[float, str, float]] = _DAILY_SCRIPT,
+                                          batch: bool = False) -> None:
         """
         Simulate a realistic daily energy flow scenario
         
-        This simulates:
+        This simulates (with the default script):
         1. Morning: PV charging starts
         2. Midday: High PV charging
         3. Evening: Grid charging (low rates)
         4. Night: Battery discharge (high rates)
-        """
-        # Morning PV charging (low rate)
-        self.set_tibber_price(0.20)  # 20 ct/kWh
-        self.simulate_pv_charging_scenario(1.0)
-        self.simulate_update_cycle()
         
-        # Midday high PV charging
-        self.set_tibber_price(0.15)  # 15 ct/kWh (low midday rates)
-        self.simulate_pv_charging_scenario(3.0)
-        self.simulate_update_cycle()
-        
-        # Evening grid charging (still reasonable rates)
-        self.set_tibber_price(0.25)  # 25 ct/kWh
-        self.simulate_grid_charging_scenario(2.0)
-        self.simulate_update_cycle()
+        Args:
+            script: (Tibber price in EUR/kWh, action, kWh increase) steps, one update cycle each;
+                action is one of 'pv', 'grid' and 'discharge'
+            batch: Apply all steps and run a single update cycle at the end. All energy
+                is then priced at the last step's Tibber price, so only use it for tests
+                that check the final energy state rather than per-step costs.
+        """
+        for price, action, kwh in script:
+            self.set_tibber_price(price)
+            self._bump_sensor(_DAILY_ACTIONS[action], kwh)
+            if not batch:
+                self.simulate_update_cycle()
         
-        # Night discharge (high rates)
-        self.set_tibber_price(0.35)  # 35 ct/kWh (peak rates)
-        self.simulate_discharge_scenario(4.0)
-        self.simulate_update_cycle()
+        if batch:
+            self.simulate_update_cycle()
     
-    def get_expected_pv_cost(self, pv_kwh: float, pv_rate_ct: float = 7.8) -> float:
+    @staticmethod
+    def get_expected_pv_cost(pv_kwh: float, pv_rate_ct: float = 7.8) -> float:
         """
         Calculate expected PV charging cost
         
@@ -234,9 +365,10 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
         Returns:
             Expected cost in EUR (negative value)
         """
-        return (pv_kwh * (-pv_rate_ct)) / 100
+        return (pv_kwh * (-pv_rate_ct)) / _CT_PER_EUR
     
-    def get_expected_grid_cost(self, grid_kwh: float, tibber_price_ct: float) -> float:
+    @staticmethod
+    def get_expected_grid_cost(grid_kwh: float, tibber_price_ct: float) -> float:
         """
         Calculate expected grid charging cost
         
@@ -247,9 +379,10 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
         Returns:
             Expected cost in EUR (negative value)
         """
-        return (grid_kwh * (-tibber_price_ct)) / 100
+        return (grid_kwh * (-tibber_price_ct)) / _CT_PER_EUR
     
-    def get_expected_discharge_savings(self, discharge_kwh: float, tibber_price_ct: float) -> float:
+    @staticmethod
+    def get_expected_discharge_savings(discharge_kwh: float, tibber_price_ct: float) -> float:
         """
         Calculate expected discharge savings
         
@@ -260,7 +393,7 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
         Returns:
             Expected savings in EUR (positive value)
         """
-        return (discharge_kwh * tibber_price_ct) / 100
+        return (discharge_kwh * tibber_price_ct) / _CT_PER_EUR
     
     def simulate_time_advance(self, days: int = 0, hours: int = 0, minutes: int = 0) -> None:
         """
@@ -271,11 +404,13 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
             hours: Number of hours to advance
             minutes: Number of minutes to advance
         """
-        total_seconds = (days * 24 * 3600) + (hours * 3600) + (minutes * 60)
+        total_seconds = days * 86400 + hours * 3600 + minutes * 60
+        # Only advance the mock for a real step (advancing can run due timers)
         if total_seconds > 0:
             self.mock.advance_time(total_seconds)
     
-    def simulate_energy_sensor_drop_and_recovery(self, sensor_id: str, drop_value: str, recovery_value: str) -> None:
+    def simulate_energy_sensor_drop_and_recovery(self, sensor_id: str, drop_value: str, recovery_value: str,
+                                                 flush: str = 'both') -> None:
         """
         Simulate an energy sensor dropping to a lower value and then recovering
         
@@ -283,10 +418,16 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
             sensor_id: The sensor to simulate drop/recovery for
             drop_value: The lower value to drop to
             recovery_value: The higher value to recover to
+            flush: 'both' runs an update cycle after the drop and after the recovery;
+                'end' only after the recovery, so the app never sees the dropped value
         """
+        if flush not in ('both', 'end'):
+            raise ValueError(f"flush must be 'both' or 'end', got {flush!r}")
+        
         # First simulate the drop
         self.simulate_sensor_update(sensor_id, drop_value)
-        self.simulate_update_cycle()
+        if flush == 'both':
+            self.simulate_update_cycle()
         
         # Then simulate the recovery
         self.simulate_sensor_update(sensor_id, recovery_value)
@@ -303,9 +444,7 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
             hour: Hour to set (0-23)
             minute: Minute to set (0-59)
         """
-        from datetime import datetime
-        new_time = datetime(year, month, day, hour, minute)
-        self.mock.set_current_time(new_time)
+        self.mock.set_current_time(datetime(year, month, day, hour, minute))
     
     def assert_time_based_sensor_reset(self, sensor_id: str) -> None:
         """
@@ -316,6 +455,16 @@ class BatteryTrackerIntegrationTest(IntegrationTestBase):
         """
         self.assert_sensor_value(sensor_id, "0")
     
+    def assert_logs_contain(self, *expected_messages: str) -> None:
+        """Assert that all expected messages were logged, reporting every missing one at once"""
+        missing_messages = []
+        for message in expected_messages:
+            try:
+                self.assert_log_contains(message)
+            except AssertionError:
+                missing_messages.append(message)
+        assert not missing_messages, f"Expected log messages not found: {missing_messages}"
+    
     def assert_energy_delta_ignored(self, expected_message: str) -> None:
         """
         Assert that an energy delta was ignored (logged as counter reset)
@@ -0,0 +1,37 @@
+"""
+Battery Savings Tracker Test Fixtures
+
+Shared pytest fixtures for the Battery Savings Tracker integration tests.
+"""
+
+import pytest
+import sys
+import os
+
+# Add the apps directory to Python path (once - conftest.py is loaded before the test modules)
+APPS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if APPS_DIR not in sys.path:
+    sys.path.insert(0, APPS_DIR)
+
+from battery_savings_tracker.battery_savings_tracker import BatterySavingsTracker
+from .battery_tracker_integration_base import BatteryTrackerIntegrationTest
+
+
+@pytest.fixture(scope="session")
+def tracker_app_class():
+    """Pytest fixture that provides the BatterySavingsTracker app class, for tests setting up their own app"""
+    return BatterySavingsTracker
+
+
+@pytest.fixture
+def battery_tracker_test(tracker_app_class):
+    """Pytest fixture that provides a fresh BatteryTrackerIntegrationTest app with realistic states for each test
+    
+    Each test gets its own app and mock, so listeners, scheduled callbacks,
+    the mock date and the tracking sensors from earlier tests can't leak into it.
+    """
+    test_base = BatteryTrackerIntegrationTest()
+    test_base.setup_app(tracker_app_class, test_base.get_default_config())
+    test_base.setup_realistic_initial_states()
+    yield test_base
+    test_base.teardown_app()